@@ -0,0 +1,123 @@
+import json
+import time
+from pathlib import Path
+
+import pygame
+
+from .utils import cache_dir
+
+SPRITE_DIR = Path(__file__).parent / "sprites"
+# System font family -> font file it resolved to, so later runs skip pygame's font scan
+FONT_CACHE = Path(cache_dir()) / "font_cache.json"
+
+# Every font the game draws with: name -> (system font family, or None for pygame's default, size)
+FONTS = {
+    "hud": ("Arial", 16),
+    "menu_title": ("Arial", 50),
+    "menu_option": ("Arial", 25),
+    "game_over": ("Arial", 36),
+    "game_over_small": ("Arial", 24),
+    "input": (None, 32),
+    "editor": (None, 24),
+    "profiler": ("couriernew,dejavusansmono,monospace", 14),
+}
+
+
+class AssetManager:
+    """Images and fonts loaded once and shared by everything that draws.
+
+    Images are converted to the display's pixel format as soon as a display exists, so blits
+    don't convert every pixel on every frame. Load times are recorded for report().
+    """
+
+    def __init__(self):
+        self._images = {}
+        self._fonts = {}
+        self._font_paths = None
+        self.timings = {}
+
+    def image(self, name, size=None):
+        """Return sprites/<name>, scaled to size if given."""
+        key = (name, size)
+        image = self._images.get(key)
+        if image is None:
+            start = time.perf_counter()
+            image = pygame.image.load(SPRITE_DIR / name)
+            if size is not None:
+                image = pygame.transform.scale(image, size)
+            # convert_alpha needs a display mode; headless callers get the unconverted surface
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self._images[key] = image
+            label = name if size is None else f"{name} {size[0]}x{size[1]}"
+            self.timings[label] = time.perf_counter() - start
+        return image
+
+    def font(self, name):
+        """Return the font registered as name in FONTS."""
+        font = self._fonts.get(name)
+        if font is None:
+            start = time.perf_counter()
+            family, size = FONTS[name]
+            # The font file is looked up instead of calling SysFont, which scans every installed
+            # font on first use. A family that isn't installed gets pygame's default font.
+            path = None if family is None else self.font_path(family)
+            font = pygame.font.Font(path, size)
+            self._fonts[name] = font
+            self.timings[f"font {name}"] = time.perf_counter() - start
+        return font
+
+    def font_path(self, family):
+        """The font file for a system font family, or None if it isn't installed. Files found are
+        cached in FONT_CACHE across runs."""
+        if self._font_paths is None:
+            try:
+                with open(FONT_CACHE, "r") as f:
+                    self._font_paths = json.load(f)
+            except (OSError, ValueError):
+                self._font_paths = {}
+
+        if family in self._font_paths:
+            path = self._font_paths[family]
+            # A miss is only remembered for this run, and an uninstalled font is looked up again
+            if path is None or Path(path).exists():
+                return path
+
+        start = time.perf_counter()
+        path = pygame.font.match_font(family)
+        self._font_paths[family] = path
+        self.timings[f"font lookup {family}"] = time.perf_counter() - start
+        if path is None:
+            # Not written out, so a font installed later is found on the next run
+            return None
+        found = {name: path for name, path in self._font_paths.items() if path is not None}
+        try:
+            FONT_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            with open(FONT_CACHE, "w") as f:
+                json.dump(found, f, indent=2)
+        except OSError:
+            # Without a writable cache directory fonts are just looked up every run
+            pass
+        return path
+
+    def preload(self, images=(), fonts=None):
+        """Load the named fonts (all registered ones by default) and (name, size) images now."""
+        for name in FONTS if fonts is None else fonts:
+            self.font(name)
+        for name, size in images:
+            self.image(name, size)
+
+    def clear(self):
+        self._images.clear()
+        self._fonts.clear()
+        self.timings.clear()
+
+    def report(self, verbose=False):
+        total = sum(self.timings.values())
+        print(f"Loaded {len(self.timings)} assets in {total * 1000:.1f} ms")
+        if verbose:
+            for label, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+                print(f"  {label}: {seconds * 1000:.1f} ms")
+
+
+assets = AssetManager()
@@ -0,0 +1,311 @@
+import argparse
+import math
+import random
+
+import numpy as np
+
+from .lander import (
+    EARTH_G0,
+    MAX_THRUST,
+    DRY_MASS,
+    FUEL_CAPACITY,
+    SPECIFIC_IMPULSE,
+    MOMENT,
+    DAMPING_FACTOR,
+    LANDER_SIZE,
+)
+from .physics import MAX_VV, MAX_VH, VV_KNEE, MAX_TILT_DEG
+from .utils import GRAVITY_MOON, SCREEN_WIDTH, SCREEN_HEIGHT
+
+FLYING = 0
+LANDED = 1
+CRASHED = 2
+
+# Terrain segments are created with this radius in Terrain.generate and the footpads with 0
+TERRAIN_RADIUS = 2.0
+
+# Footpad positions in body coordinates, matching Lander.body.left_foot / right_foot
+FOOT_X = LANDER_SIZE[0] / 2
+FOOT_Y = -LANDER_SIZE[1] / 2
+
+# How many neighbouring segments either side of the one under a foot are tested for contact
+CONTACT_WINDOW = 2
+
+
+def safe_landing(vv, vh, tilt_deg):
+    """Vectorized PhysicsWorld.doghouse_safe_landing."""
+    max_vh = np.where(vv <= VV_KNEE, MAX_VH, (4.0 / 3.0) * (MAX_VV - vv))
+    return (vv <= MAX_VV) & (vh <= MAX_VH) & (vh <= max_vh) & (tilt_deg <= MAX_TILT_DEG)
+
+
+class BatchLanders:
+    """N landers advanced together as structure-of-arrays state.
+
+    Reproduces one pymunk step of the game exactly: Lander.apply_controls (thrust impulse, fuel
+    burn, rotate/stop_rotation) followed by PhysicsWorld.step, where Chipmunk integrates position
+    with the current velocity, tests contacts, then applies gravity and torque to the velocity.
+    Touchdown is judged like PhysicsWorld.handle_collision against the terrain polyline and a
+    lander is frozen once it has landed or crashed.
+    """
+
+    def __init__(
+        self,
+        n,
+        xs,
+        ys,
+        is_pad,
+        gravity=GRAVITY_MOON,
+        spawn=(SCREEN_WIDTH // 5, SCREEN_HEIGHT - 100),
+        starting_fuel=0.1,
+        dt=1.0 / 30,
+    ):
+        self.n = n
+        self.dt = dt
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+        self.is_pad = np.asarray(is_pad, dtype=bool)
+        self.max_y = self.ys.max()
+
+        self.gravity = np.broadcast_to(np.asarray(gravity, dtype=np.float64), (n,)).copy()
+        spawn = np.broadcast_to(np.asarray(spawn, dtype=np.float64), (n, 2))
+        self.x = spawn[:, 0].copy()
+        self.y = spawn[:, 1].copy()
+        self.vx = np.zeros(n)
+        self.vy = np.zeros(n)
+        self.angle = np.zeros(n)
+        self.angular_velocity = np.zeros(n)
+        self.torque = np.zeros(n)
+        starting_fuel = np.broadcast_to(np.asarray(starting_fuel, dtype=np.float64), (n,))
+        self.fuel = FUEL_CAPACITY * starting_fuel
+        self.mass = DRY_MASS + self.fuel
+        self.throttle_pct = np.zeros(n)
+
+        self.status = np.full(n, FLYING, dtype=np.int8)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.impact_vv = np.full(n, np.nan)
+        self.impact_vh = np.full(n, np.nan)
+        self.impact_tilt = np.full(n, np.nan)
+        self.impact_segment = np.full(n, -1, dtype=np.int64)
+
+    @classmethod
+    def from_terrain(cls, terrain, n, **kwargs):
+        xs, ys, is_pad = terrain.polyline()
+        return cls(n, xs, ys, is_pad, **kwargs)
+
+    @property
+    def flying(self):
+        return self.status == FLYING
+
+    @property
+    def done(self):
+        return not self.flying.any()
+
+    def step(self, throttle_pct=0.0, rotation=0, dt=None):
+        """Advance every flying lander by one step. Inputs may be scalars or length-n arrays."""
+        dt = self.dt if dt is None else dt
+        active = self.flying
+        if not active.any():
+            return
+
+        throttle_pct = np.broadcast_to(np.asarray(throttle_pct, dtype=np.float64), (self.n,))
+        rotation = np.broadcast_to(np.asarray(rotation, dtype=np.float64), (self.n,))
+
+        # Lander.thrust: impulse along the body's up axis, then burn fuel at Isp
+        thrusting = active & (throttle_pct > 0) & (self.fuel > 0)
+        self.throttle_pct = np.where(thrusting, throttle_pct, self.throttle_pct)
+        thrust = np.where(thrusting, MAX_THRUST * throttle_pct, 0.0)
+        dv = thrust * dt / self.mass
+        self.vx -= dv * np.sin(self.angle)
+        self.vy += dv * np.cos(self.angle)
+        propellant_used = thrust / (SPECIFIC_IMPULSE * EARTH_G0) * dt
+        self.fuel = np.where(thrusting, np.maximum(0, self.fuel - propellant_used), self.fuel)
+        self.mass = DRY_MASS + self.fuel
+
+        # Lander.rotate / stop_rotation
+        rotating = rotation != 0
+        self.torque = np.where(active & rotating, MAX_THRUST * rotation, 0.0)
+        self.angular_velocity = np.where(
+            active & ~rotating, self.angular_velocity * DAMPING_FACTOR, self.angular_velocity
+        )
+
+        # Chipmunk position integration uses the velocity from before this step's forces
+        self.x = np.where(active, self.x + self.vx * dt, self.x)
+        self.y = np.where(active, self.y + self.vy * dt, self.y)
+        self.angle = np.where(active, self.angle + self.angular_velocity * dt, self.angle)
+
+        self._resolve_contacts(active)
+
+        # Velocity integration for landers still in the air
+        active = self.flying
+        self.vy = np.where(active, self.vy - self.gravity * dt, self.vy)
+        self.angular_velocity = np.where(
+            active, self.angular_velocity + self.torque / MOMENT * dt, self.angular_velocity
+        )
+        self.steps += active
+
+    def _feet(self, idx):
+        x, y = self.x[idx], self.y[idx]
+        cos_a = np.cos(self.angle[idx])
+        sin_a = np.sin(self.angle[idx])
+        feet = []
+        for fx in (-FOOT_X, FOOT_X):
+            feet.append((x + fx * cos_a - FOOT_Y * sin_a, y + fx * sin_a + FOOT_Y * cos_a))
+        return feet
+
+    def _foot_contact(self, px, py):
+        """Distance from each foot to the polyline and the index of the nearest segment."""
+        n_segments = len(self.xs) - 1
+        base = np.clip(np.searchsorted(self.xs, px) - 1, 0, n_segments - 1)
+        best_dist = np.full(px.shape, np.inf)
+        best_seg = base.copy()
+        for offset in range(-CONTACT_WINDOW, CONTACT_WINDOW + 1):
+            seg = np.clip(base + offset, 0, n_segments - 1)
+            ax, ay = self.xs[seg], self.ys[seg]
+            bx, by = self.xs[seg + 1], self.ys[seg + 1]
+            dx, dy = bx - ax, by - ay
+            length_sq = dx * dx + dy * dy
+            t = np.where(length_sq > 0, ((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0)
+            t = np.clip(t, 0.0, 1.0)
+            dist = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+            closer = dist < best_dist
+            best_dist = np.where(closer, dist, best_dist)
+            best_seg = np.where(closer, seg, best_seg)
+
+        # A foot that tunnelled below the surface in one step is still in contact
+        below = py < np.interp(px, self.xs, self.ys)
+        best_dist = np.where(below, 0.0, best_dist)
+        return best_dist, best_seg
+
+    def _resolve_contacts(self, active):
+        # Broadphase: only landers whose feet can reach the highest terrain point need testing
+        reach = math.hypot(FOOT_X, FOOT_Y) + TERRAIN_RADIUS
+        idx = np.nonzero(active & (self.y - reach < self.max_y))[0]
+        if not len(idx):
+            return
+
+        (lx, ly), (rx, ry) = self._feet(idx)
+        left_dist, left_seg = self._foot_contact(lx, ly)
+        right_dist, right_seg = self._foot_contact(rx, ry)
+
+        touching = (left_dist < TERRAIN_RADIUS) | (right_dist < TERRAIN_RADIUS)
+        if not touching.any():
+            return
+
+        idx = idx[touching]
+        lx, rx = lx[touching], rx[touching]
+        segment = np.where(left_dist <= right_dist, left_seg, right_seg)[touching]
+        vv = np.abs(self.vy[idx])
+        vh = np.abs(self.vx[idx])
+        tilt = np.degrees(self.angle[idx])
+        envelope_ok = safe_landing(vv, vh, tilt)
+
+        pad_l = np.minimum(self.xs[segment], self.xs[segment + 1])
+        pad_r = np.maximum(self.xs[segment], self.xs[segment + 1])
+        on_pad = self.is_pad[segment] & (lx >= pad_l) & (rx <= pad_r)
+
+        self.status[idx] = np.where(envelope_ok & on_pad, LANDED, CRASHED)
+        self.impact_vv[idx] = vv
+        self.impact_vh[idx] = vh
+        self.impact_tilt[idx] = tilt
+        self.impact_segment[idx] = segment
+
+    def run(self, policy, max_steps=10000):
+        """Step until every lander is down or max_steps, using policy(self) -> (throttle, rotation)."""
+        for _ in range(max_steps):
+            if self.done:
+                break
+            throttle_pct, rotation = policy(self)
+            self.step(throttle_pct, rotation)
+        return self.status
+
+
+def cross_check(
+    gravity=GRAVITY_MOON,
+    difficulty=1,
+    starting_fuel=0.1,
+    spawn=None,
+    controls=None,
+    steps=3000,
+    dt=1.0 / 30,
+    seed=0,
+):
+    """Fly the same control sequence through the pymunk Simulation and BatchLanders.
+
+    Returns the largest per-step position, velocity and angle differences while both were airborne
+    and whether the two engines agreed on the outcome.
+    """
+    from .simulation import Simulation
+
+    sim = Simulation(gravity, difficulty, starting_fuel, spawn=spawn, dt=dt)
+    batch = BatchLanders.from_terrain(
+        sim.terrain, 1, gravity=gravity, spawn=sim.spawn, starting_fuel=starting_fuel, dt=dt
+    )
+
+    if controls is None:
+        rng = random.Random(seed)
+        controls = []
+        for _ in range(steps):
+            controls.append((rng.choice((0.0, 0.0, 0.4, 0.8, 1.0)), rng.choice((-1, 0, 0, 1))))
+
+    max_pos = max_vel = max_angle = 0.0
+    flown = 0
+    for throttle_pct, rotation in controls:
+        if sim.done or batch.done:
+            break
+        sim.step(throttle_pct, rotation)
+        batch.step(throttle_pct, rotation)
+        flown += 1
+        if sim.done or batch.done:
+            # Pymunk has already applied the contact impulse to the velocity, so stop comparing
+            break
+        body = sim.lander.body
+        max_pos = max(
+            max_pos, math.hypot(body.position.x - batch.x[0], body.position.y - batch.y[0])
+        )
+        max_vel = max(
+            max_vel, math.hypot(body.velocity.x - batch.vx[0], body.velocity.y - batch.vy[0])
+        )
+        max_angle = max(max_angle, abs(body.angle - batch.angle[0]))
+
+    sim_outcome = "landed" if sim.landed else "crashed" if sim.crashed else "flying"
+    batch_outcome = ("flying", "landed", "crashed")[batch.status[0]]
+    return {
+        "steps": flown,
+        "max_position_error": max_pos,
+        "max_velocity_error": max_vel,
+        "max_angle_error": max_angle,
+        "pymunk_outcome": sim_outcome,
+        "batch_outcome": batch_outcome,
+        "outcome_match": sim_outcome == batch_outcome,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the batch engine against pymunk")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--difficulty", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for run in range(args.runs):
+        gravity = rng.uniform(1, 10)
+        result = cross_check(
+            gravity=gravity,
+            difficulty=args.difficulty,
+            starting_fuel=rng.uniform(0.05, 0.3),
+            seed=rng.randrange(2**31),
+        )
+        mismatches += not result["outcome_match"]
+        print(
+            f"run {run}: g={gravity:.2f} steps={result['steps']} "
+            f"pos_err={result['max_position_error']:.2e} vel_err={result['max_velocity_error']:.2e} "
+            f"angle_err={result['max_angle_error']:.2e} "
+            f"pymunk={result['pymunk_outcome']} batch={result['batch_outcome']}"
+        )
+    print(f"{mismatches} outcome mismatches in {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
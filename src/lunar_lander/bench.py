@@ -0,0 +1,286 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+import pygame
+import pymunk
+
+from .lander import Lander
+from .physics import PhysicsWorld
+from .terrain import Terrain, terrain_cache
+from .utils import GRAVITY_MOON, SCREEN_WIDTH, SCREEN_HEIGHT, WHITE
+
+SPAWN = (SCREEN_WIDTH // 5, SCREEN_HEIGHT - 100)
+# Steps per physics round: ten seconds of flight, long enough that the lander is still falling
+PHYSICS_STEPS = 300
+RENDER_FRAMES = 120
+DT = 1.0 / 30
+
+
+def measure(fn, rounds, setup=None, min_round=0.05):
+    """Best time in seconds of one fn() call, like timeit: each of rounds rounds repeats fn() for
+    at least min_round seconds, and the fastest round's mean is returned.
+
+    setup(), if given, runs untimed before every call.
+    """
+
+    def call():
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    # Warm-up call, which also sizes the rounds
+    number = max(1, math.ceil(min_round / max(call(), 1e-9)))
+    best = float("inf")
+    # As timeit does, keep the collector from landing in one round and not another
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            best = min(best, sum(call() for _ in range(number)) / number)
+    finally:
+        gc.enable()
+    return best
+
+
+def result(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def build_world(difficulty=1, world_width=None, seed=0):
+    physics = PhysicsWorld(GRAVITY_MOON)
+    terrain = Terrain(
+        physics.space, SCREEN_WIDTH, SCREEN_HEIGHT, difficulty, seed=seed, world_width=world_width
+    )
+    lander = Lander(physics.space, pos=SPAWN, starting_fuel=0.1, seed=seed)
+    physics.set_terrain(terrain)
+    return physics, terrain, lander
+
+
+def bench_terrain(rounds):
+    results = {}
+    for difficulty in range(1, 6):
+        # A generated world one screen wide is the level the game would generate for a missing file
+        _, terrain, _ = build_world(difficulty, world_width=SCREEN_WIDTH)
+        seconds = measure(terrain.generate, rounds)
+        results[f"terrain.generate[{difficulty}]"] = result(seconds * 1000, "ms", False)
+
+    for difficulty in range(1, 6):
+        _, terrain, _ = build_world(difficulty)
+        if not os.path.exists(terrain.terrain_path()):
+            continue
+
+        def load():
+            # Time the file read, not the cache hit every restart after the first gets
+            terrain_cache.clear()
+            terrain.generate()
+
+        seconds = measure(load, rounds)
+        results[f"terrain.load[level_{difficulty}]"] = result(seconds * 1000, "ms", False)
+    return results
+
+
+def bench_physics(rounds):
+    physics, terrain, lander = build_world()
+    rng = random.Random(0)
+
+    def fly(debris):
+        def run():
+            physics.reset()
+            lander.reset(seed=0)
+            if debris:
+                # The debris of one explosion, falling alongside a lander that is still flying
+                physics.debris.spawn_explosion(lander.body.position, lander.body.velocity, rng=rng)
+            for _ in range(PHYSICS_STEPS):
+                physics.step(DT)
+
+        return run
+
+    results = {}
+    for name, debris in (("physics.step", False), ("physics.step+debris", True)):
+        seconds = measure(fly(debris), rounds)
+        results[name] = result(PHYSICS_STEPS / seconds, "steps/s", True)
+    return results
+
+
+def bench_render(rounds):
+    # Imported here so the terrain and physics benchmarks run without fonts
+    from .ui import HUD, GameOverMenu
+    from .telemetry import Telemetry
+
+    screen = pygame.display.get_surface()
+    physics, terrain, lander = build_world()
+    hud = HUD()
+    game_over_menu = GameOverMenu()
+    telemetry = Telemetry()
+    results = {}
+
+    def game():
+        physics.reset()
+        lander.reset(seed=0)
+        telemetry.clear()
+        for frame in range(RENDER_FRAMES):
+            lander.apply_controls(0.5, 1 if frame % 40 < 20 else -1, DT)
+            physics.step(DT)
+            altitude = lander.get_altitude(terrain.index)
+            telemetry.sample(frame * DT, lander, altitude)
+            terrain.draw(screen, SCREEN_HEIGHT)
+            lander.draw(screen, SCREEN_HEIGHT)
+            pad = terrain.index.nearest_pad(*lander.body.position)
+            hud.draw(
+                screen,
+                lander.get_velocity(),
+                lander.fuel_remaining,
+                lander.fuel_capacity,
+                altitude,
+                lander.throttle_pct,
+                frame * DT,
+                pad,
+                telemetry,
+            )
+            pygame.display.flip()
+
+    results["render.game"] = result(RENDER_FRAMES / measure(game, rounds), "fps", True)
+
+    def fly():
+        physics.reset()
+        lander.reset(seed=0)
+        physics.step(DT)
+
+    def crash():
+        lander.explode(physics.debris)
+        physics.step(DT)
+        terrain.draw(screen, SCREEN_HEIGHT)
+        physics.debris.draw(screen, SCREEN_HEIGHT, WHITE, 2)
+        pygame.display.flip()
+
+    # The frame the lander blows up in, as main draws it
+    results["render.explode"] = result(measure(crash, rounds, fly) * 1000, "ms", False)
+
+    def exploded():
+        fly()
+        crash()
+
+    def crash_animation():
+        for _ in range(RENDER_FRAMES):
+            physics.step(DT)
+            terrain.draw(screen, SCREEN_HEIGHT)
+            physics.debris.draw(screen, SCREEN_HEIGHT)
+            pygame.display.flip()
+
+    seconds = measure(crash_animation, rounds, exploded)
+    results["render.crash_animation"] = result(RENDER_FRAMES / seconds, "fps", True)
+
+    stats = {"fuel": 0.0, "vx": 1.0, "vy": -5.0, "angle": 12.0}
+
+    def game_over():
+        for _ in range(RENDER_FRAMES):
+            terrain.draw(screen, SCREEN_HEIGHT)
+            physics.debris.draw(screen, SCREEN_HEIGHT)
+            game_over_menu.draw(screen, "CRASHED!", stats)
+            pygame.display.flip()
+
+    results["render.game_over"] = result(RENDER_FRAMES / measure(game_over, rounds), "fps", True)
+    return results
+
+
+SUITES = {
+    "terrain": bench_terrain,
+    "physics": bench_physics,
+    "render": bench_render,
+}
+
+
+def run(suites, rounds):
+    """Run the named suites and return the results document."""
+    random.seed(0)
+    results = {}
+    for name in suites:
+        results.update(SUITES[name](rounds))
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "pymunk": pymunk.version,
+            "numpy": np.__version__,
+            "video_driver": pygame.display.get_driver(),
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print each result against the baseline and return the names that regressed."""
+    regressions = []
+    print(f"{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results["results"].items():
+        base = baseline["results"].get(name)
+        value = f"{current['value']:.2f} {current['unit']}"
+        if base is None:
+            print(f"{name:<28} {'-':>12} {value:>12} {'new':>8}")
+            continue
+        change = current["value"] / base["value"] - 1
+        # Positive when the benchmark got worse, whichever way its unit runs
+        loss = -change if current["higher_is_better"] else change
+        flag = ""
+        if loss > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<28} {base['value']:>12.2f} {value:>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark terrain, physics and rendering")
+    parser.add_argument("suites", nargs="*", help=f"Any of {', '.join(SUITES)}; default all")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--out", default="bench_results.json", help="Results JSON file")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="Compared if it exists")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown, 0.1 = 10%%")
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    # Render into an offscreen surface so results don't depend on the window system
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    results = run(args.suites or list(SUITES), args.rounds)
+    pygame.quit()
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}")
+            sys.exit(1)
+    else:
+        for name, current in results["results"].items():
+            print(f"{name:<28} {current['value']:>12.2f} {current['unit']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+class Camera:
+    """Maps world coordinates (pymunk, y up) to screen pixels, scrolling sideways after a target.
+
+    The view is width x height pixels and starts at the left edge of the world. follow() scrolls it
+    only once the target leaves the middle of the screen, and never past either end of the world.
+    """
+
+    def __init__(self, width, height, extent=None, margin=0.3):
+        self.width = width
+        self.height = height
+        # Right edge of the world, None if it is endless
+        self.extent = extent
+        self.margin = margin
+        self.x = 0.0
+
+    @property
+    def offset(self):
+        """Whole pixels the view is scrolled by, so everything drawn moves in step."""
+        return int(self.x)
+
+    def reset(self, extent=None):
+        self.extent = extent
+        self.x = 0.0
+
+    def view(self):
+        """World x range on screen."""
+        return self.x, self.x + self.width
+
+    def follow(self, x):
+        """Scroll so x stays inside the middle of the view. Returns True if the view moved."""
+        previous = self.offset
+        left = self.x + self.width * self.margin
+        right = self.x + self.width * (1 - self.margin)
+        if x < left:
+            self.x -= left - x
+        elif x > right:
+            self.x += x - right
+
+        if self.extent is not None:
+            self.x = min(self.x, max(0.0, self.extent - self.width))
+        self.x = max(0.0, self.x)
+        return self.offset != previous
+
+    def to_screen(self, p):
+        return int(p[0]) - self.offset, int(self.height - p[1])
@@ -1,32 +1,214 @@
-import pygame
-import json
+import bisect
+import itertools
 import math
+
+import pygame
 from .ui import InputBox, WHITE, GREEN, RED
+from . import terrain_io
+from .assets import assets
+
+# How close in pixels a click has to be to a point or segment to pick it
+PICK_RADIUS = 10
+# How long a status message such as a load error stays on screen
+STATUS_MS = 4000
+
+
+class TerrainPoints:
+    """The editor's terrain: points kept sorted by x in parallel xs/ys/pads lists, where pads[i]
+    marks the segment from point i to point i + 1 as a landing pad.
+
+    Segments are found by bisecting xs and points through a grid of PICK_RADIUS cells, so
+    neither depends on how many points there are. Every change is recorded as a small diff
+    (an insert, removal, move or pad flag with the index it applied at) and undo/redo replay
+    those diffs, rather than keeping copies of the terrain.
+    """
+
+    def __init__(self, xs=(), ys=(), pads=()):
+        self.xs = []
+        self.ys = []
+        self.pads = []
+        # (col, row) -> [(x, y), ...] of the points in that cell
+        self._grid = {}
+        self.undo_stack = []
+        self.redo_stack = []
+        # The diffs of the edit in progress and how many begin_edit calls it is inside
+        self._edit = None
+        self._edit_depth = 0
+        # Pads belong to the segments between neighbours, which sorting would change
+        if any(b < a for a, b in zip(xs, xs[1:])):
+            raise ValueError("terrain points are not in x order")
+        for x, y, pad in zip(xs, ys, pads):
+            self._insert(len(self.xs), x, y, pad)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _cell(self, x, y):
+        return int(x // PICK_RADIUS), int(y // PICK_RADIUS)
+
+    def _insert(self, i, x, y, pad):
+        self.xs.insert(i, x)
+        self.ys.insert(i, y)
+        self.pads.insert(i, pad)
+        self._grid.setdefault(self._cell(x, y), []).append((x, y))
+
+    def _remove(self, i):
+        x, y = self.xs.pop(i), self.ys.pop(i)
+        cell = self._cell(x, y)
+        self._grid[cell].remove((x, y))
+        if not self._grid[cell]:
+            del self._grid[cell]
+        return x, y, self.pads.pop(i)
+
+    def _apply(self, diff, undo=False):
+        kind = diff[0]
+        if kind == "insert":
+            _, i, x, y, pad = diff
+            if undo:
+                self._remove(i)
+            else:
+                self._insert(i, x, y, pad)
+        elif kind == "move":
+            _, i, j, old, new = diff
+            if undo:
+                i, j, new = j, i, old
+            pad = self._remove(i)[2]
+            self._insert(j, *new, pad)
+        elif kind == "pad":
+            _, i, old, new = diff
+            self.pads[i] = old if undo else new
+
+    def _record(self, diff):
+        if self._edit is None:
+            self.undo_stack.append([diff])
+            self.redo_stack.clear()
+            return
+        last = self._edit[-1] if self._edit else None
+        if diff[0] == "move" and last and last[0] == "move" and last[2] == diff[1]:
+            # A drag moves the same point many times; only where it started and ended matters
+            self._edit[-1] = ("move", last[1], diff[2], last[3], diff[4])
+        else:
+            self._edit.append(diff)
+
+    def begin_edit(self):
+        """Group the changes up to the matching end_edit into one undo step. Edits nest: one
+        begun inside another, like a pad toggle during a drag, joins the outer one's step."""
+        if self._edit_depth == 0:
+            self._edit = []
+        self._edit_depth += 1
+
+    def end_edit(self):
+        if self._edit_depth == 0:
+            return
+        self._edit_depth -= 1
+        if self._edit_depth == 0:
+            if self._edit:
+                self.undo_stack.append(self._edit)
+                self.redo_stack.clear()
+            self._edit = None
+
+    def undo(self):
+        # Not in the middle of an edit, whose indices the undo would shift
+        if self._edit is not None or not self.undo_stack:
+            return False
+        edit = self.undo_stack.pop()
+        for diff in reversed(edit):
+            self._apply(diff, undo=True)
+        self.redo_stack.append(edit)
+        return True
+
+    def redo(self):
+        # Not in the middle of an edit, whose indices the redo would shift
+        if self._edit is not None or not self.redo_stack:
+            return False
+        edit = self.redo_stack.pop()
+        for diff in edit:
+            self._apply(diff)
+        self.undo_stack.append(edit)
+        return True
+
+    def insert(self, x, y, pad=False):
+        """Add a point in x order and return its index."""
+        i = bisect.bisect_right(self.xs, x)
+        diff = ("insert", i, x, y, pad)
+        self._apply(diff)
+        self._record(diff)
+        return i
+
+    def move(self, i, x, y):
+        """Move point i to x, y and return its index, which changes if it passes another point."""
+        old = (self.xs[i], self.ys[i])
+        pad = self._remove(i)[2]
+        j = bisect.bisect_right(self.xs, x)
+        self._insert(j, x, y, pad)
+        self._record(("move", i, j, old, (x, y)))
+        return j
+
+    def set_pad(self, i, pad):
+        if self.pads[i] != pad:
+            diff = ("pad", i, self.pads[i], pad)
+            self._apply(diff)
+            self._record(diff)
+
+    def point_at(self, x, y):
+        """Index of the point nearest to x, y within PICK_RADIUS, or -1."""
+        col, row = self._cell(x, y)
+        best = None
+        best_dist = PICK_RADIUS
+        for cell in itertools.product((col - 1, col, col + 1), (row - 1, row, row + 1)):
+            for px, py in self._grid.get(cell, ()):
+                dist = math.hypot(px - x, py - y)
+                if dist < best_dist:
+                    best, best_dist = (px, py), dist
+        if best is None:
+            return -1
+        # Points sharing an x are next to each other in xs
+        i = bisect.bisect_left(self.xs, best[0])
+        while self.ys[i] != best[1]:
+            i += 1
+        return i
+
+    def segment_at(self, x, y):
+        """Index of the segment whose start is the last point at or left of x, if it passes
+        within PICK_RADIUS of x, y vertically, or -1."""
+        i = bisect.bisect_right(self.xs, x) - 1
+        if i < 0 or i >= len(self.xs) - 1:
+            return -1
+        x1, y1, x2, y2 = self.xs[i], self.ys[i], self.xs[i + 1], self.ys[i + 1]
+        # x2 > x because bisect_right put x before it, so the segment has width
+        t = (x - x1) / (x2 - x1)
+        if abs(y1 + t * (y2 - y1) - y) < PICK_RADIUS:
+            return i
+        return -1
 
 
 class TerrainEditor:
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.points = []  # List of {'x', 'y', 'isPad'}
         self.selected_point_idx = -1
         self.dragging = False
-        self.mode = "EDIT"  # EDIT, SAVE_FILENAME, PAD_WIDTH
+        self.mode = "EDIT"  # EDIT, SAVE_FILENAME, LOAD_FILENAME, PAD_WIDTH
 
         # Input boxes
         self.filename_box = InputBox(width // 2 - 100, height // 2, 200, 32)
         self.pad_width_box = InputBox(width // 2 - 100, height // 2, 200, 32)
         self.editing_pad_idx = -1
+        # (text, color, ticks when it goes away) shown under the instructions, see show_status
+        self.status = None
 
-        # Initial point
-        self.points.append({"x": 0, "y": height // 2, "isPad": False})
+        # Initial point, not something to undo
+        self.points = TerrainPoints([0], [height // 2], [False])
 
     def handle_input(self, events):
         for event in events:
-            if self.mode == "SAVE_FILENAME":
+            if self.mode in ("SAVE_FILENAME", "LOAD_FILENAME"):
                 filename = self.filename_box.handle_event(event)
                 if filename is not None:
-                    self.save_terrain(filename)
+                    if self.mode == "SAVE_FILENAME":
+                        self.save_terrain(filename)
+                    else:
+                        self.load_terrain(filename)
                     self.mode = "EDIT"
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     self.mode = "EDIT"
@@ -50,9 +232,17 @@ class TerrainEditor:
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
+                    self.end_drag()
                     return "MENU"
-                elif event.key == pygame.K_s:
-                    self.mode = "SAVE_FILENAME"
+                elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                    if event.mod & pygame.KMOD_SHIFT:
+                        self.points.redo()
+                    else:
+                        self.points.undo()
+                elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                    self.points.redo()
+                elif event.key in (pygame.K_s, pygame.K_l):
+                    self.mode = "SAVE_FILENAME" if event.key == pygame.K_s else "LOAD_FILENAME"
                     self.filename_box.text = "custom_terrain.json"
                     self.filename_box.txt_surface = self.filename_box.font.render(
                         self.filename_box.text, True, self.filename_box.color
@@ -68,11 +258,9 @@ class TerrainEditor:
                     if clicked_idx != -1:
                         self.selected_point_idx = clicked_idx
                         self.dragging = True
+                        # The whole drag is one undo step
+                        self.points.begin_edit()
                     else:
-                        # Add new point if not dragging
-                        # Insert based on x coordinate to keep sorted?
-                        # Or just append? Terrain generation usually goes left to right.
-                        # Let's enforce left-to-right for simplicity or just insert.
                         self.add_point(pos)
 
                 elif event.button == 3:  # Right click
@@ -97,22 +285,19 @@ class TerrainEditor:
 
             if event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
-                    self.dragging = False
-                    self.selected_point_idx = -1
+                    self.end_drag()
 
             if event.type == pygame.MOUSEMOTION:
                 if self.dragging and self.selected_point_idx != -1:
-                    self.points[self.selected_point_idx]["x"] = event.pos[0]
-                    self.points[self.selected_point_idx]["y"] = event.pos[1]
-                    # Sort points by x?
-                    # self.points.sort(key=lambda p: p['x'])
-                    # If we sort, the index changes, dragging breaks.
-                    # Maybe don't sort while dragging, but sort after?
+                    # The points stay sorted, so the dragged point's index follows it
+                    self.selected_point_idx = self.points.move(
+                        self.selected_point_idx, event.pos[0], event.pos[1]
+                    )
 
         return "EDITOR"
 
     def update(self):
-        if self.mode == "SAVE_FILENAME":
+        if self.mode in ("SAVE_FILENAME", "LOAD_FILENAME"):
             self.filename_box.update()
         elif self.mode == "PAD_WIDTH":
             self.pad_width_box.update()
@@ -120,40 +305,30 @@ class TerrainEditor:
     def draw(self, screen):
         screen.fill((0, 0, 0))
 
-        # Draw segments
-        if len(self.points) > 1:
-            # Sort for drawing lines correctly?
-            # It's better if points are always sorted by X.
-            sorted_points = sorted(self.points, key=lambda p: p["x"])
-
-            for i in range(len(sorted_points) - 1):
-                p1 = sorted_points[i]
-                p2 = sorted_points[i + 1]
-
-                color = (100, 100, 100)
-                width = 2
-                if p1.get("isPad", False):
-                    color = (184, 115, 51)  # Brown
-                    width = 6
-
-                pygame.draw.line(screen, color, (p1["x"], p1["y"]), (p2["x"], p2["y"]), width)
+        # Draw segments: the whole line in one call, then the pads over it
+        points = self.points
+        if len(points) > 1:
+            line = list(zip(points.xs, points.ys))
+            pygame.draw.lines(screen, (100, 100, 100), False, line, 2)
+            for i in itertools.compress(range(len(points) - 1), points.pads):
+                pygame.draw.line(screen, (184, 115, 51), line[i], line[i + 1], 6)  # Brown
 
         # Draw points
-        for i, p in enumerate(self.points):
+        for i, (x, y) in enumerate(zip(points.xs, points.ys)):
             color = GREEN
             if i == self.selected_point_idx:
                 color = RED
-            pygame.draw.circle(screen, color, (int(p["x"]), int(p["y"])), 5)
+            pygame.draw.circle(screen, color, (int(x), int(y)), 5)
 
         # Draw UI
-        if self.mode == "SAVE_FILENAME":
+        if self.mode in ("SAVE_FILENAME", "LOAD_FILENAME"):
             pygame.draw.rect(
                 screen,
                 (0, 0, 0),
                 (self.filename_box.rect.x, self.filename_box.rect.y - 30, 200, 60),
             )
             self.filename_box.draw(screen)
-            msg = pygame.font.Font(None, 24).render("Enter Filename:", True, WHITE)
+            msg = assets.font("editor").render("Enter Filename:", True, WHITE)
             screen.blit(msg, (self.filename_box.rect.x, self.filename_box.rect.y - 25))
 
         elif self.mode == "PAD_WIDTH":
@@ -163,124 +338,96 @@ class TerrainEditor:
                 (self.pad_width_box.rect.x, self.pad_width_box.rect.y - 30, 200, 60),
             )
             self.pad_width_box.draw(screen)
-            msg = pygame.font.Font(None, 24).render("Enter Width:", True, WHITE)
+            msg = assets.font("editor").render("Enter Width:", True, WHITE)
             screen.blit(msg, (self.pad_width_box.rect.x, self.pad_width_box.rect.y - 25))
 
         # Instructions
-        info = pygame.font.Font(None, 24).render(
-            "L-Click: Add/Move | R-Click Segment: Toggle Pad | R-Click Pad: Edit Width | S: Save | ESC: Menu",
+        info = assets.font("editor").render(
+            "L-Click: Add/Move | R-Click Segment: Toggle Pad | R-Click Pad: Edit Width | "
+            "Ctrl+Z/Y: Undo/Redo | S: Save | L: Load | ESC: Menu",
             True,
             WHITE,
         )
         screen.blit(info, (10, 10))
 
+        if self.status is not None:
+            text, color, until = self.status
+            if pygame.time.get_ticks() < until:
+                screen.blit(assets.font("editor").render(text, True, color), (10, 40))
+            else:
+                self.status = None
+
+    def end_drag(self):
+        if self.dragging:
+            self.points.end_edit()
+        self.dragging = False
+        self.selected_point_idx = -1
+
     def get_point_at(self, pos):
-        for i, p in enumerate(self.points):
-            dist = math.hypot(p["x"] - pos[0], p["y"] - pos[1])
-            if dist < 10:
-                return i
-        return -1
+        return self.points.point_at(*pos)
 
     def add_point(self, pos):
-        self.points.append({"x": pos[0], "y": pos[1], "isPad": False})
-        self.points.sort(key=lambda p: p["x"])
+        self.points.insert(pos[0], pos[1])
 
     def get_segment_at(self, pos):
-        # Find segment closest to click
-        sorted_points = sorted(self.points, key=lambda p: p["x"])
-        for i in range(len(sorted_points) - 1):
-            p1 = sorted_points[i]
-            p2 = sorted_points[i + 1]
-
-            # Distance from point to line segment
-            # ... simple check: x within range and y close?
-            if p1["x"] <= pos[0] <= p2["x"]:
-                # Interpolate y
-                t = (pos[0] - p1["x"]) / (p2["x"] - p1["x"])
-                y = p1["y"] + t * (p2["y"] - p1["y"])
-                if abs(y - pos[1]) < 10:
-                    # Need to find original index of p1
-                    # Because we sorted, indices changed.
-                    # But we store isPad on the point itself.
-                    # So we return the index in the sorted list?
-                    # Wait, isPad is stored on the START point of the segment.
-                    # So we need to find p1 in self.points.
-                    return self.points.index(p1)
-        return -1
+        # isPad is stored on the start point of the segment, so this is also the pad's index
+        return self.points.segment_at(*pos)
 
     def get_pad_at(self, pos):
         # Similar to get_segment_at but only returns if isPad is True
         idx = self.get_segment_at(pos)
-        if idx != -1:
-            if self.points[idx].get("isPad", False):
-                return idx
+        if idx != -1 and self.points.pads[idx]:
+            return idx
         return -1
 
     def toggle_pad(self, idx):
-        # Toggle isPad
-        # If turning ON, flatten the segment
-        p1 = self.points[idx]
-        # Find p2 (next in sorted order)
-        sorted_points = sorted(self.points, key=lambda p: p["x"])
-        p1_sorted_idx = sorted_points.index(p1)
-
-        if p1_sorted_idx < len(sorted_points) - 1:
-            p2 = sorted_points[p1_sorted_idx + 1]
-
-            current = p1.get("isPad", False)
-            p1["isPad"] = not current
-
-            if not current:  # Turning ON
-                # Flatten: set p2.y to p1.y
-                p2["y"] = p1["y"]
+        # If turning ON, flatten the segment by moving its end point to the start's height
+        points = self.points
+        if idx < len(points) - 1:
+            points.begin_edit()
+            current = points.pads[idx]
+            points.set_pad(idx, not current)
+            if not current:
+                points.move(idx + 1, points.xs[idx + 1], points.ys[idx])
+            points.end_edit()
 
     def update_pad_width(self, width):
-        if self.editing_pad_idx != -1:
-            p1 = self.points[self.editing_pad_idx]
-            sorted_points = sorted(self.points, key=lambda p: p["x"])
-            p1_sorted_idx = sorted_points.index(p1)
-
-            if p1_sorted_idx < len(sorted_points) - 1:
-                p2 = sorted_points[p1_sorted_idx + 1]
-                # Adjust p2.x to be p1.x + width
-                p2["x"] = p1["x"] + width
-                # Also ensure y matches
-                p2["y"] = p1["y"]
+        points = self.points
+        idx = self.editing_pad_idx
+        if idx != -1 and idx < len(points) - 1:
+            # Move the pad's end point to width from its start, at the same height
+            points.begin_edit()
+            points.move(idx + 1, points.xs[idx] + width, points.ys[idx])
+            points.end_edit()
+
+    def show_status(self, text, color=WHITE):
+        self.status = (text, color, pygame.time.get_ticks() + STATUS_MS)
+
+    def load_terrain(self, filename):
+        try:
+            xs, ys, is_pad = terrain_io.read_terrain(filename)
+            # Files are in Pymunk coordinates (y up), the editor in Pygame's (y down)
+            points = TerrainPoints(
+                [float(x) for x in xs],
+                [self.height - float(y) for y in ys],
+                [bool(p) for p in is_pad],
+            )
+        except Exception as e:
+            self.show_status(f"Error loading {filename}: {e}", RED)
+            return
+        self.end_drag()
+        self.points = points
+        self.show_status(f"Loaded {len(self.points)} points from {filename}", GREEN)
 
     def save_terrain(self, filename):
-        # Ensure sorted
-        self.points.sort(key=lambda p: p["x"])
-
-        # Convert to format expected by Terrain loader
-        # Loader expects list of objects.
-        # But wait, loader expects Pymunk coordinates (y up) or Pygame (y down)?
-        # Terrain.generate uses:
-        # p1 = (p1_data["x"], p1_data["y"])
-        # segment = pymunk.Segment(..., p1, p2, ...)
-        # Pymunk uses Y up. Pygame uses Y down.
-        # The existing terrain_data.json seems to have Y values like 200, 300.
-        # Screen height is 900.
-        # If Y is 200 in Pygame, it's near top.
-        # If Y is 200 in Pymunk, it's near bottom.
-        # Let's check terrain.py draw method.
-        # p1 = to_pygame(line.a, height) -> int(p.x), int(height - p.y)
-        # So Pymunk stores Y up.
-        # The editor works in Pygame coordinates (Y down).
-        # So we need to convert Y when saving.
-
-        save_data = []
-        for p in self.points:
-            save_data.append(
-                {
-                    "x": p["x"],
-                    "y": self.height - p["y"],  # Convert to Pymunk
-                    "isPad": p.get("isPad", False),
-                }
-            )
+        # The editor works in Pygame coordinates (Y down) and terrain files store Pymunk's (Y up)
+        xs = self.points.xs
+        ys = [self.height - y for y in self.points.ys]
+        is_pad = self.points.pads
 
         try:
-            with open(filename, "w") as f:
-                json.dump(save_data, f, indent=4)
+            # JSON, or the binary format when the filename ends in .ltb
+            terrain_io.write_terrain(filename, xs, ys, is_pad)
             print(f"Saved terrain to {filename}")
         except Exception as e:
             print(f"Error saving: {e}")
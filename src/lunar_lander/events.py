@@ -0,0 +1,179 @@
+import atexit
+import queue
+import sys
+import threading
+
+
+class Event:
+    """Base for everything published on the event bus. str() is the event's log line."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class LandingEvaluated(Event):
+    """A foot first touched the ground and the touchdown was checked against the envelope and pad.
+
+    reason is why it was not a safe landing, or None if it was.
+    """
+
+    __slots__ = ("vv", "vh", "tilt", "is_pad", "reason")
+
+    def __init__(self, vv, vh, tilt, is_pad, reason):
+        self.vv = vv
+        self.vh = vh
+        self.tilt = tilt
+        self.is_pad = is_pad
+        self.reason = reason
+
+    @property
+    def safe(self):
+        return self.reason is None
+
+    def __str__(self):
+        verdict = self.reason or "safe"
+        return (
+            f"Touchdown vh={self.vh:.1f}, vv={self.vv:.1f}, angle={self.tilt:.2f}, "
+            f"pad={self.is_pad}: {verdict}"
+        )
+
+
+class Crashed(Event):
+    __slots__ = ("vv", "vh", "tilt", "is_pad", "reason")
+
+    def __init__(self, vv, vh, tilt, is_pad, reason):
+        self.vv = vv
+        self.vh = vh
+        self.tilt = tilt
+        self.is_pad = is_pad
+        self.reason = reason
+
+    def __str__(self):
+        return f"CRASHED! vh={self.vh:.1f}, vv={self.vv:.1f}, angle={self.tilt:.2f}: {self.reason}"
+
+
+class Landed(Event):
+    __slots__ = ("vv", "vh", "tilt", "pad")
+
+    def __init__(self, vv, vh, tilt, pad):
+        self.vv = vv
+        self.vh = vh
+        self.tilt = tilt
+        # (left, right) bounds of the pad landed on
+        self.pad = pad
+
+    def __str__(self):
+        return f"LANDED SAFE! vh={self.vh:.1f}, vv={self.vv:.1f}, angle={self.tilt:.2f}"
+
+
+class TerrainLoaded(Event):
+    """New ground is in place: source is "file", "generated" (and saved to path) or "streamed"."""
+
+    __slots__ = ("source", "difficulty", "path", "seed")
+
+    def __init__(self, source, difficulty, path=None, seed=None):
+        self.source = source
+        self.difficulty = difficulty
+        self.path = path
+        self.seed = seed
+
+    def __str__(self):
+        if self.source == "file":
+            return f"Loaded terrain from {self.path}."
+        if self.source == "generated":
+            return f"Generated terrain for level {self.difficulty}, saved to {self.path}."
+        return f"Streaming generated terrain for level {self.difficulty}, seed {self.seed}."
+
+
+class Log(Event):
+    """A free-form message for the log."""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class EventBus:
+    """Synchronous publish/subscribe for game events.
+
+    publish() calls every subscriber of the event's type or any of its base classes, in the
+    publisher's thread, so subscribers must be quick: collect the event or hand it off, as
+    LogWriter does, and never do I/O.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, event_type, callback):
+        """Call callback(event) for every event of event_type, Event for all of them."""
+        self._subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+        self._subscribers[event_type].remove(callback)
+
+    def publish(self, event):
+        for cls in type(event).__mro__:
+            for callback in self._subscribers.get(cls, ()):
+                callback(event)
+
+
+class LogWriter:
+    """Writes published events to a stream from a background thread.
+
+    handle() only queues the event, so publishing never waits on the terminal. submit() queues
+    other slow work, like saving a file, to run on the same thread in order with the log.
+    close() finishes whatever is still queued; it is also registered to run at exit.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def handle(self, event):
+        self._queue.put(event)
+
+    def submit(self, job):
+        """Call job() on the writer thread. It may publish events to report what it did."""
+        self._queue.put(job)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            stream = self.stream or sys.stdout
+            if isinstance(item, Event):
+                stream.write(f"{item}\n")
+            else:
+                try:
+                    item()
+                except Exception as e:
+                    stream.write(f"Background job failed: {e}\n")
+            # Write out everything that arrived together before flushing once
+            if self._queue.empty():
+                stream.flush()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+events = EventBus()
+
+
+def start_log_writer(stream=None):
+    """Log every event published on events to stream (stdout by default) and return the writer."""
+    writer = LogWriter(stream)
+    events.subscribe(Event, writer.handle)
+    return writer
@@ -2,58 +2,77 @@ import math
 import pymunk
 import pygame
 import random
-from pathlib import Path
+from .events import Log, events
 from .utils import app_config
-
-explosion_palette = [
-    (255, 200, 100),  # hot white core (still bright but reduced)
-    (255, 180, 80),
-    (255, 160, 60),
-    (255, 140, 40),
-    (255, 120, 30),
-    (255, 100, 20),
-    (240, 90, 15),
-    (220, 80, 10),
-    (200, 70, 8),
-    (180, 65, 5),  # strong dark orange
-    (160, 60, 5),
-    (140, 55, 5),
-    (120, 50, 5),  # deep red-orange
-    (100, 45, 5),
-    (90, 40, 5),
-    (80, 35, 5),
-    (70, 30, 8),  # very dark red with slight purple hint
-    (60, 25, 8),
-    (50, 20, 10),
-    (40, 15, 10),  # almost black, perfect for smoke/fade-out]
-]
+from .sprite_cache import RotationCache
+from .assets import assets
 
 # G₀ = 9.80665 m/s² is used — even on the Moon — because Specific Impulse (Isp) is defined and
 # measured using Earth-standard gravity. This makes Isp a universal constant for a given engine in
 # vacuum, regardless of where you are (Earth, Moon, Mars, deep space).
 EARTH_G0 = 9.80665
 
+# Apollo LM descent stage figures shared by the pymunk Lander and the batch engine
+MAX_THRUST = 45050  # Newtons
+DRY_MASS = 6853  # kg
+FUEL_CAPACITY = 8212  # kg
+SPECIFIC_IMPULSE = 305  # seconds
+MOMENT = 40000
+DAMPING_FACTOR = 0.75
+LANDER_SIZE = (50, 50)
+
+_rotation_caches = {}
+
+
+def load_sprite(size):
+    """The lander sprite scaled to size, shared through the asset manager."""
+    return assets.image("lander.png", size)
+
+
+def get_rotation_cache(size=LANDER_SIZE):
+    """Rotated lander sprites shared by every Lander of this size."""
+    if size not in _rotation_caches:
+        _rotation_caches[size] = RotationCache(load_sprite(size))
+    return _rotation_caches[size]
+
 
 class Lander:
-    def __init__(self, space, pos, starting_fuel=1.0):
+    def __init__(self, space, pos, starting_fuel=1.0, seed=None):
         self.space = space
-        self.max_thrust = 45050
+        self.spawn = pos
+        self.starting_fuel = starting_fuel
+        self.max_thrust = MAX_THRUST
         self.max_torque = self.max_thrust
-        self.dry_mass = 6853
-        self.fuel_capacity = 8212
+        self.dry_mass = DRY_MASS
+        self.fuel_capacity = FUEL_CAPACITY
         self.fuel_remaining = self.fuel_capacity * starting_fuel
         self.throttle_pct = 0.0
-        self.damping_factor = 0.75
+        self.damping_factor = DAMPING_FACTOR
         self.is_thrusting = False
-        self.specific_impulse = 305
+        self.specific_impulse = SPECIFIC_IMPULSE
+        # Flame flicker and explosion debris draw from this so a seeded flight replays exactly
+        self.rng = random.Random(seed)
+        self.flame_len = 0.0
 
+        self.size = LANDER_SIZE
+        self._create_body(pos)
+        self.is_thrusting = False
+
+        # The sprite is only loaded on first draw so headless simulations never touch pygame
+        self._image = None
+        self._sprite_cache = None
+        self.landed = False
+
+        events.publish(Log(f"mass={self.body.mass:.0f} moment={self.body.moment:.0f}"))
+
+    def _create_body(self, pos):
         # Create body
         total_mass = self.dry_mass + self.fuel_remaining
-        moment = 40000
+        moment = MOMENT
         self.body = pymunk.Body(mass=total_mass, moment=moment)
 
         self.body.position = pos
-        lander_size = (50, 50)
+        lander_size = self.size
 
         # Footpads for collision detection. These must be placed such that they are aligned with the
         # landing pads on the sprite image which should be at the bottom corners of the sprite
@@ -80,13 +99,39 @@ class Lander:
             pad.collision_type = 1
 
         self.space.add(self.body, *self.landing_pads)
-        self.is_thrusting = False
 
-        self.image = pygame.image.load(Path(__file__).parent / "sprites" / "lander.png")
-        self.image = pygame.transform.scale(self.image, lander_size)
+    def reset(self, pos=None, starting_fuel=None, seed=None):
+        """Put the lander back at its spawn point, at rest and refuelled."""
+        if pos is not None:
+            self.spawn = pos
+        if starting_fuel is not None:
+            self.starting_fuel = starting_fuel
+        if seed is not None:
+            self.rng.seed(seed)
+
+        # Swap in a fresh body rather than teleporting the old one: Chipmunk keeps the contact
+        # solver's bias velocity on a body that just touched down and would apply it next step.
+        # An exploded lander was already taken out of the space.
+        if self.body.space is not None:
+            self.space.remove(self.body, *self.landing_pads)
+        self.fuel_remaining = self.fuel_capacity * self.starting_fuel
+        self._create_body(self.spawn)
+
+        self.throttle_pct = 0.0
+        self.is_thrusting = False
         self.landed = False
 
-        print("mass={:.0f} moment={:.0f}".format(self.body.mass, self.body.moment))
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = load_sprite(self.size)
+        return self._image
+
+    @property
+    def sprite_cache(self):
+        if self._sprite_cache is None:
+            self._sprite_cache = get_rotation_cache(self.size)
+        return self._sprite_cache
 
     def thrust(self, throttle_pct, dt):
         if self.fuel_remaining <= 0:
@@ -109,6 +154,9 @@ class Lander:
         self.body.mass = self.dry_mass + self.fuel_remaining
 
         self.is_thrusting = True
+        # Flame point relative to body bottom center and goes down from there with a minimum
+        # length then scales with throttle percentage. Drawn once per step, not per frame.
+        self.flame_len = self.rng.uniform(10, 50) * (0.1 + (0.9 * self.throttle_pct))
 
     def update_attitude_control(self, keys):
         # RHC input – example from pygame keys or joystick
@@ -138,76 +186,94 @@ class Lander:
         self.body.torque = 0
         self.body.angular_velocity *= self.damping_factor
 
-    def draw(self, screen, height):
+    def apply_controls(self, throttle_pct, rotation, dt):
+        """Apply one physics step of pilot input.
+
+        throttle_pct is in [0, 1], rotation is +1 (left), -1 (right) or 0 (hold/damp).
+        """
+        self.is_thrusting = False
+        if throttle_pct > 0:
+            self.thrust(throttle_pct, dt)
+
+        if rotation:
+            self.rotate(rotation)
+        else:
+            self.stop_rotation()
+
+    def draw(self, screen, height, pose=None, camera=None):
+        """Draw at the body's pose, or at pose=(position, angle) when interpolating between steps."""
+        position, angle = pose if pose is not None else (self.body.position, self.body.angle)
+
         # Convert pymunk coordinates to pygame
         def to_pygame(p):
+            if camera is not None:
+                return camera.to_screen(p)
             return int(p.x), int(height - p.y)
 
-        lander_center_pygame = to_pygame(self.body.position)
-        rotated_image = pygame.transform.rotate(self.image, self.body.angle * 180 / 3.14159)
+        def local_to_world(p):
+            return position + pymunk.Vec2d(*p).rotated(angle)
+
+        lander_center_pygame = to_pygame(position)
+        rotated_image = self.sprite_cache.get(math.degrees(angle))
         image_rect = rotated_image.get_rect(center=lander_center_pygame)
-        screen.blit(rotated_image, image_rect)
+        dirty = screen.blit(rotated_image, image_rect)
 
         # Draw pads
         if app_config.debug:
             for shape in [self.body.left_foot, self.body.right_foot]:
-                p1 = to_pygame(self.body.local_to_world(shape.a))
-                p2 = to_pygame(self.body.local_to_world(shape.b))
-                pygame.draw.line(screen, (255, 255, 255), p1, p2, 2)
+                p1 = to_pygame(local_to_world(shape.a))
+                p2 = to_pygame(local_to_world(shape.b))
+                dirty.union_ip(pygame.draw.line(screen, (255, 255, 255), p1, p2, 2))
 
         # Draw thrust flame
         if self.is_thrusting and self.fuel_remaining > 0 and not self.landed:
             flame_y = -25
             flame_x_offset = 3
             flame_width = 4
-            # Flame point relative to body bottom center and goes down from there with a minimum
-            # length then scales with throttle percentage.
-            flame_len = random.uniform(10, 50) * (0.1 + (0.9 * self.throttle_pct))
+            flame_len = self.flame_len
 
-            f1 = self.body.local_to_world((flame_x_offset - flame_width, flame_y))
-            f2 = self.body.local_to_world((flame_x_offset + flame_width, flame_y))
-            f3 = self.body.local_to_world((flame_x_offset, flame_y - flame_len))
+            f1 = local_to_world((flame_x_offset - flame_width, flame_y))
+            f2 = local_to_world((flame_x_offset + flame_width, flame_y))
+            f3 = local_to_world((flame_x_offset, flame_y - flame_len))
 
             points = [to_pygame(f1), to_pygame(f2), to_pygame(f3)]
-            pygame.draw.polygon(screen, (255, 165, 0), points)  # Orange
+            dirty.union_ip(pygame.draw.polygon(screen, (255, 165, 0), points))  # Orange
 
             # Inner flame
             flame_len_inner = flame_len * 0.6
-            f1_i = self.body.local_to_world((flame_x_offset - flame_width, flame_y))
-            f2_i = self.body.local_to_world((flame_x_offset + flame_width, flame_y))
-            f3_i = self.body.local_to_world((flame_x_offset, flame_y - flame_len_inner))
+            f1_i = local_to_world((flame_x_offset - flame_width, flame_y))
+            f2_i = local_to_world((flame_x_offset + flame_width, flame_y))
+            f3_i = local_to_world((flame_x_offset, flame_y - flame_len_inner))
 
             points_i = [to_pygame(f1_i), to_pygame(f2_i), to_pygame(f3_i)]
             pygame.draw.polygon(screen, (255, 255, 0), points_i)  # Yellow
 
+        # Screen area touched by this draw, for dirty-rect display updates
+        return dirty
+
     def get_velocity(self):
         return self.body.velocity
 
-    def get_altitude(self):
-        # Feet are at local y = -50
-        # Transform (0, -50) to world
-        feet_pos = self.body.local_to_world((0, -50))
-        return feet_pos.y
-
-    def explode(self):
-        # Remove original body and shapes
+    def get_altitude(self, terrain_index=None):
+        """Radar altitude of the lowest foot, or its world y when no terrain index is given."""
+        # Called every physics step for telemetry, so the feet are placed with plain floats
+        # instead of a Vec2d per foot from local_to_world
+        body = self.body
+        x, y = body.position
+        cos_a = math.cos(body.angle)
+        sin_a = math.sin(body.angle)
+        # Both feet sit at the bottom corners, (-w/2, -h/2) and (w/2, -h/2) in body coordinates
+        half_w = self.size[0] / 2
+        half_h = self.size[1] / 2
+        left_x = x - half_w * cos_a + half_h * sin_a
+        left_y = y - half_w * sin_a - half_h * cos_a
+        right_x = x + half_w * cos_a + half_h * sin_a
+        right_y = y + half_w * sin_a - half_h * cos_a
+        if terrain_index is None:
+            return min(left_y, right_y)
+        return min(terrain_index.altitude(left_x, left_y), terrain_index.altitude(right_x, right_y))
+
+    def explode(self, debris):
+        # Remove original body and shapes and scatter the pieces as lightweight debris particles
         self.space.remove(self.body, *self.landing_pads)
-        # Create debris
-        for n in range(1, 100):
-            mass = 0.2
-            s = int(n / 15.0) + 1
-            size = (random.randint(s, s), random.randint(s, s))
-            moment = pymunk.moment_for_box(mass, size)
-            body = pymunk.Body(mass, moment)
-            body.position = self.body.position
-            vel_factor = 5
-            vel_x = random.uniform(-vel_factor * n, vel_factor * n)
-            vel_y = random.uniform(-vel_factor * 0, vel_factor * n)
-            body.velocity = self.body.velocity + (vel_x, vel_y)
-            body.angular_velocity = random.uniform(-10, 10)
-            shape = pymunk.Poly.create_box(body, size)
-            shape.elasticity = 0.8
-            shape.friction = 0.8
-            shape.collision_type = 0
-            shape.color = random.choice(explosion_palette)
-            self.space.add(body, shape)
+        debris.spawn_explosion(self.body.position, self.body.velocity, rng=self.rng)
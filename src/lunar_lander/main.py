@@ -1,42 +1,153 @@
+import time
+
+# Taken before anything else is imported so --startup-report can count the imports
+IMPORT_START = time.perf_counter()
+
+import argparse
 import pygame
+import random
 import sys
 from .physics import PhysicsWorld
-from .lander import Lander
+from .lander import Lander, get_rotation_cache, LANDER_SIZE
 from .terrain import Terrain
 from .ui import HUD, Menu, GameOverMenu
-from .editor import TerrainEditor
-from .utils import WHITE
+from .render import DirtyRenderer, open_display
+from .camera import Camera
+from .events import start_log_writer
+from .assets import assets
+from .replay import Recorder, Recording, save_flight, terrain_hash
+from .telemetry import Telemetry, export_samples
+from .trajectory import TrajectoryPredictor
+from .profiler import FrameProfiler, StartupTimer
+from .utils import WHITE, SCREEN_WIDTH, SCREEN_HEIGHT, app_config
 import pymunk
 
-SCREEN_WIDTH, SCREEN_HEIGHT = 1800, 900
-
-
-def to_pygame(p, height):
-    """Convert pymunk coordinates to pygame coordinates."""
-    return int(p.x), int(height - p.y)
+# Physics always advances in fixed steps of this size, whatever the display frame rate
+PHYSICS_HZ = 30
+PHYSICS_DT = 1.0 / PHYSICS_HZ
+# Longest frame the simulation will catch up on, so a stall doesn't snowball into more stalls
+MAX_FRAME_TIME = 0.25
+
+
+def start_game(gravity, difficulty, world=None, effects_seed=None):
+    """Return (physics_space, terrain, lander) for a new flight.
+
+    An existing world is reset in place: the space, collision handler, terrain segments and
+    lander body are all reused.
+    """
+    if world is None:
+        physics_space = PhysicsWorld(gravity)
+        terrain = Terrain(
+            physics_space.space,
+            SCREEN_WIDTH,
+            SCREEN_HEIGHT,
+            difficulty,
+            world_width=app_config.world_width,
+        )
+        lander = Lander(
+            physics_space.space,
+            pos=(SCREEN_WIDTH // 5, SCREEN_HEIGHT - 100),
+            starting_fuel=0.1,
+            seed=effects_seed,
+        )
+    else:
+        physics_space, terrain, lander = world
+        physics_space.reset(gravity)
+        terrain.reset(difficulty)
+        lander.reset(seed=effects_seed)
+        # Require space to be released again before it thrusts, as for a new world
+        if hasattr(physics_space, "space_released"):
+            del physics_space.space_released
+
+    physics_space.set_terrain(terrain)
+    return physics_space, terrain, lander
 
 
-def start_game(gravity, difficulty):
-    physics_space = PhysicsWorld(gravity)
-    terrain = Terrain(physics_space.space, SCREEN_WIDTH, SCREEN_HEIGHT, difficulty)
-    lander = Lander(physics_space.space, pos=(SCREEN_WIDTH // 5, SCREEN_HEIGHT - 100), starting_fuel=0.1)
-    return physics_space, terrain, lander
+def start_recording(gravity, substeps, terrain, lander, effects_seed):
+    """Begin recording a flight that start_game just set up."""
+    return Recorder(
+        Recording(
+            gravity,
+            terrain.difficulty,
+            lander.starting_fuel,
+            lander.spawn,
+            substeps,
+            # Generated worlds pick their seed when none is configured
+            getattr(terrain.source, "seed", terrain.seed),
+            effects_seed,
+            terrain.world_width,
+            terrain.terrain_file,
+            terrain_hash(terrain),
+        )
+    )
+
+
+def finish_recording(writer, recorder, outcome, lander=None, telemetry=None):
+    """Save the flight's recording, and its telemetry alongside it if given, on the writer's
+    thread so the frame the flight ends in doesn't wait on the disk."""
+    recording = recorder.finish(outcome, lander)
+    # Copied now, as the next flight clears and refills the buffer
+    samples = None if telemetry is None else telemetry.window().copy()
+    suffix = "." + app_config.telemetry_format
+
+    def save():
+        path = save_flight(recording)
+        if samples is not None:
+            export_samples(path.with_suffix(suffix), samples)
+
+    writer.submit(save)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Lunar Lander")
+    parser.add_argument(
+        "--startup-report", action="store_true", help="Print where the startup time went"
+    )
+    app_config.add_arguments(parser)
+    args = parser.parse_args()
+    app_config.apply_args(args)
+    # Game events are logged, and flights saved, from a background thread so the game loop
+    # never waits on stdout or the disk
+    log_writer = start_log_writer()
+    startup = StartupTimer(IMPORT_START)
+    startup.mark("imports")
+
     pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=512)
     pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Lunar Lander")
+    startup.mark("pygame.init")
+    screen = open_display(SCREEN_WIDTH, SCREEN_HEIGHT, "Lunar Lander")
     clock = pygame.time.Clock()
+    startup.mark("display")
+
+    # Only what the menu needs is loaded before the first frame, the rest right after it
+    assets.preload(fonts=["menu_title", "menu_option"])
+    menu = Menu()
+    startup.mark("menu")
 
     physics_space = None
     terrain = None
     lander = None
-    hud = HUD()
-    menu = Menu()
-    game_over_menu = GameOverMenu()
-    editor = TerrainEditor(SCREEN_WIDTH, SCREEN_HEIGHT)
+    # Kept across flights so restarts reset it instead of rebuilding; lander is None after a crash
+    world = None
+    # Every flight is recorded step by step and saved when it ends, see replay.py
+    recorder = None
+    # Per-step samples of the current flight for the HUD plot, exported on landing or crash
+    telemetry = Telemetry()
+    # Scrolls the view along worlds wider than the screen
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+    # Touchdown point and speeds if the current throttle and attitude are held
+    predictor = TrajectoryPredictor(dt=PHYSICS_DT)
+    # Phase timings for the debug overlay and a trace dump on exit; free when disabled
+    profiler = FrameProfiler(enabled=app_config.profiler)
+    hud = None
+    game_over_menu = None
+    # Created on first entry, see the EDITOR action
+    editor = None
+
+    # Only push changed regions to the display instead of flipping the whole window
+    renderer = DirtyRenderer(enabled=app_config.dirty_rects)
+    drawn_state = None
+    drawn_menu = None
 
     state = "MENU"
     crash_timer = 0.0
@@ -46,15 +157,25 @@ def main():
     result_text = ""
     mouse_origin_y = 0
     total_time = 0.0
-    fps = 30
+    # Render frame cap, 0 for uncapped. Physics runs at PHYSICS_HZ regardless.
+    fps = app_config.fps
+    substeps = max(1, app_config.physics_substeps)
+    accumulator = 0.0
+    previous_pose = None
 
     running = True
 
     while running:
-        dt = 1.0 / fps
-        total_time += dt
+        frame_time = min(clock.tick(fps) / 1000.0, MAX_FRAME_TIME)
+        profiler.begin_frame()
 
-        events = pygame.event.get()
+        # Each state is drawn in full on its first frame and incrementally after that
+        frame_state = state
+        if state != drawn_state:
+            renderer.invalidate()
+
+        with profiler.phase("events"):
+            events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
@@ -63,14 +184,30 @@ def main():
             action = menu.handle_input(events)
             if action == "GAME":
                 state = "GAME"
-                physics_space, terrain, lander = start_game(menu.gravity, menu.difficulty)
+                effects_seed = random.randrange(2**32)
+                world = start_game(menu.gravity, menu.difficulty, world, effects_seed)
+                physics_space, terrain, lander = world
+                recorder = start_recording(menu.gravity, substeps, terrain, lander, effects_seed)
+                telemetry.clear()
+                camera.reset(terrain.extent)
                 mouse_origin_y = pygame.mouse.get_pos()[1]
                 total_time = 0.0
+                accumulator = 0.0
+                previous_pose = None
             elif action == "EDITOR":
                 state = "EDITOR"
+                if editor is None:
+                    from .editor import TerrainEditor
+
+                    editor = TerrainEditor(SCREEN_WIDTH, SCREEN_HEIGHT)
 
-            screen.fill((0, 0, 0))  # Clear screen for menu
-            menu.draw(screen)
+            # The menu only changes when a setting does
+            menu_settings = (menu.gravity, menu.difficulty)
+            if not renderer.incremental or menu_settings != drawn_menu:
+                screen.fill((0, 0, 0))  # Clear screen for menu
+                menu.draw(screen)
+                renderer.invalidate()
+                drawn_menu = menu_settings
 
         elif state == "EDITOR":
             action = editor.handle_input(events)
@@ -81,167 +218,248 @@ def main():
 
             editor.update()
             editor.draw(screen)
+            renderer.invalidate()
 
         elif state == "GAME":
             # Input
-            keys = pygame.key.get_pressed()
-
-            # Prevent thrust if space is still held from menu
-            if not hasattr(physics_space, "space_released"):
-                if not keys[pygame.K_SPACE]:
-                    physics_space.space_released = True
-
-            if lander and getattr(physics_space, "space_released", False):
-                lander.is_thrusting = False
-
-                # Mouse control
-                current_mouse_y = pygame.mouse.get_pos()[1]
-                # Up is negative in pygame, so origin - current gives positive for upward movement
-                mouse_delta = mouse_origin_y - current_mouse_y
-                throttle_pct = max(0.0, min(1.0, mouse_delta / 200.0))  # 200 pixels range
-
-                if keys[pygame.K_SPACE] or keys[pygame.K_UP]:
-                    throttle_pct = 1.0
-
-                if throttle_pct > 0:
-                    lander.thrust(throttle_pct, dt)
-
-                if keys[pygame.K_LEFT]:
-                    lander.rotate(1)
-                elif keys[pygame.K_RIGHT]:
-                    lander.rotate(-1)
-                else:
-                    lander.stop_rotation()
+            with profiler.phase("input"):
+                keys = pygame.key.get_pressed()
+
+                # Prevent thrust if space is still held from menu
+                if not hasattr(physics_space, "space_released"):
+                    if not keys[pygame.K_SPACE]:
+                        physics_space.space_released = True
+
+                throttle_pct = 0.0
+                rotation = 0
+                if lander and getattr(physics_space, "space_released", False):
+                    # Mouse control
+                    current_mouse_y = pygame.mouse.get_pos()[1]
+                    # Up is negative in pygame, so origin - current is positive for upward movement
+                    mouse_delta = mouse_origin_y - current_mouse_y
+                    throttle_pct = max(0.0, min(1.0, mouse_delta / 200.0))  # 200 pixels range
+
+                    if keys[pygame.K_SPACE] or keys[pygame.K_UP]:
+                        throttle_pct = 1.0
+
+                    if keys[pygame.K_LEFT]:
+                        rotation = 1
+                    elif keys[pygame.K_RIGHT]:
+                        rotation = -1
 
             # Check for pause/menu
             for event in events:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     state = "MENU"
-
-            # Physics
-            physics_space.step(dt)
-
-            # Check game state
-            if physics_space.crashed:
-                print("CRASHED!")
-                # Capture stats
-                crash_fuel = lander.fuel_remaining
-                crash_vel = lander.get_velocity()
-                crash_angle = lander.body.angle * (180.0 / 3.14159)  # Convert to degrees
-
-                lander.explode()
-                physics_space.crashed = False
-                lander = None  # Disable control
-                state = "CRASH_ANIMATION"
-                crash_timer = 4.0
-                result_text = "CRASHED!"
-
-            elif physics_space.landed:
-                lander.landed = True
-                print("Level Complete!")
-                physics_space.landed = False
-                state = "GAME_OVER"
-                result_text = "SUCCESSFUL LANDING!"
+                    if recorder:
+                        finish_recording(log_writer, recorder, "aborted", lander)
+                        recorder = None
+
+            # Physics: run as many fixed steps as the elapsed time covers, holding this frame's input
+            accumulator += frame_time
+            while accumulator >= PHYSICS_DT and lander:
+                previous_pose = (lander.body.position, lander.body.angle)
+                applied = (0.0, 0)
+                if getattr(physics_space, "space_released", False):
+                    with profiler.phase("thrust"):
+                        lander.apply_controls(throttle_pct, rotation, PHYSICS_DT)
+                    applied = (throttle_pct, rotation)
+                with profiler.phase("physics"):
+                    physics_space.step(PHYSICS_DT, substeps)
+                profiler.count_step(physics_space.space)
+                if recorder:
+                    recorder.record(*applied, PHYSICS_DT, lander)
+                total_time += PHYSICS_DT
+                telemetry.sample(total_time, lander, lander.get_altitude(terrain.index))
+                accumulator -= PHYSICS_DT
+
+                # Check game state
+                if physics_space.crashed:
+                    # Capture stats
+                    crash_fuel = lander.fuel_remaining
+                    crash_vel = lander.get_velocity()
+                    crash_angle = lander.body.angle * (180.0 / 3.14159)  # Convert to degrees
+                    if recorder:
+                        finish_recording(log_writer, recorder, "crashed", telemetry=telemetry)
+                        recorder = None
+
+                    lander.explode(physics_space.debris)
+                    physics_space.crashed = False
+                    lander = None  # Disable control
+                    state = "CRASH_ANIMATION"
+                    crash_timer = 4.0
+                    result_text = "CRASHED!"
+
+                elif physics_space.landed:
+                    lander.landed = True
+                    if recorder:
+                        finish_recording(log_writer, recorder, "landed", telemetry=telemetry)
+                        recorder = None
+                    physics_space.landed = False
+                    state = "GAME_OVER"
+                    result_text = "SUCCESSFUL LANDING!"
+                    break
+
+            # Scroll with the lander and stream the terrain around the new view. A scrolled view
+            # changes the whole background, so it can't be drawn incrementally.
+            if lander:
+                if camera.follow(lander.body.position.x):
+                    renderer.invalidate()
+                if terrain.stream(*camera.view()):
+                    physics_space.set_terrain(terrain)
 
             # Render
-            screen.fill((0, 0, 0))
-            terrain.draw(screen, SCREEN_HEIGHT)
+            # The cached terrain background is opaque, so erasing last frame's sprites with it is
+            # equivalent to redrawing the whole screen
+            with profiler.phase("terrain"):
+                if renderer.incremental:
+                    renderer.erase(screen, terrain.background(screen, SCREEN_HEIGHT, camera))
+                else:
+                    terrain.draw(screen, SCREEN_HEIGHT, camera)
 
             if lander:
-                lander.draw(screen, SCREEN_HEIGHT)
+                if app_config.prediction:
+                    with profiler.phase("prediction"):
+                        xs, ys, _ = terrain.polyline()
+                        held = (
+                            throttle_pct if getattr(physics_space, "space_released", False) else 0
+                        )
+                        gravity = -physics_space.space.gravity.y
+                        prediction = predictor.predict(lander, held, gravity, xs, ys, terrain.index)
+                        renderer.add(hud.draw_prediction(screen, SCREEN_HEIGHT, prediction, camera))
+
+                # Draw between the last two physics states by how far we are into the next step
+                pose = None
+                if previous_pose is not None:
+                    alpha = accumulator / PHYSICS_DT
+                    position = previous_pose[0].interpolate_to(lander.body.position, alpha)
+                    angle = previous_pose[1] + (lander.body.angle - previous_pose[1]) * alpha
+                    pose = (position, angle)
+                with profiler.phase("lander"):
+                    renderer.add(lander.draw(screen, SCREEN_HEIGHT, pose, camera))
 
                 # HUD
                 vel = lander.get_velocity()
-                alt = lander.get_altitude()
+                alt = lander.get_altitude(terrain.index)
+                pad = terrain.index.nearest_pad(*lander.body.position)
 
                 # Ensure we pass the current fuel value
-                hud.draw(
-                    screen,
-                    vel,
-                    lander.fuel_remaining,
-                    lander.fuel_capacity,
-                    alt,
-                    lander.throttle_pct,
-                    total_time,
-                )
+                with profiler.phase("hud"):
+                    hud_rects = hud.draw(
+                        screen,
+                        vel,
+                        lander.fuel_remaining,
+                        lander.fuel_capacity,
+                        alt,
+                        lander.throttle_pct,
+                        total_time,
+                        pad,
+                        telemetry,
+                    )
+                renderer.add(hud_rects)
             else:
-                # Draw debris
-                for body in physics_space.space.bodies:
-                    if body.body_type == pymunk.Body.DYNAMIC:
-                        for shape in body.shapes:
-                            if isinstance(shape, pymunk.Poly):
-                                points = []
-                                for v in shape.get_vertices():
-                                    p_world = body.local_to_world(v)
-                                    points.append(to_pygame(p_world, SCREEN_HEIGHT))
-                                pygame.draw.polygon(screen, WHITE, points, 2)
+                with profiler.phase("debris"):
+                    debris_rects = physics_space.debris.draw(
+                        screen, SCREEN_HEIGHT, WHITE, 2, camera
+                    )
+                renderer.add(debris_rects)
+            renderer.add(profiler.draw(screen))
 
         elif state == "CRASH_ANIMATION":
             # Step physics to animate debris
-            physics_space.step(dt)
-            crash_timer -= dt
+            accumulator += frame_time
+            while accumulator >= PHYSICS_DT:
+                with profiler.phase("physics"):
+                    physics_space.step(PHYSICS_DT, substeps)
+                profiler.count_step(physics_space.space)
+                crash_timer -= PHYSICS_DT
+                accumulator -= PHYSICS_DT
 
             if crash_timer <= 0:
                 state = "GAME_OVER"
 
             # Render
-            screen.fill((0, 0, 0))
-            terrain.draw(screen, SCREEN_HEIGHT)
-
-            # Draw debris
-            for body in physics_space.space.bodies:
-                if body.body_type == pymunk.Body.DYNAMIC:
-                    for shape in body.shapes:
-                        if isinstance(shape, pymunk.Poly):
-                            points = []
-                            for v in shape.get_vertices():
-                                p_world = body.local_to_world(v)
-                                points.append(to_pygame(p_world, SCREEN_HEIGHT))
-                            pygame.draw.polygon(screen, shape.color, points, 0)
+            with profiler.phase("terrain"):
+                if renderer.incremental:
+                    renderer.erase(screen, terrain.background(screen, SCREEN_HEIGHT, camera))
+                else:
+                    terrain.draw(screen, SCREEN_HEIGHT, camera)
+
+            with profiler.phase("debris"):
+                renderer.add(physics_space.debris.draw(screen, SCREEN_HEIGHT, camera=camera))
+            renderer.add(profiler.draw(screen))
 
         elif state == "GAME_OVER":
             # Render game background (frozen)
-            # We need to render the game objects but not step physics
-            screen.fill((0, 0, 0))
-            terrain.draw(screen, SCREEN_HEIGHT)
+            # We need to render the game objects but not step physics. Nothing moves, so once
+            # drawn the screen is left alone until the state changes.
+            if not renderer.incremental:
+                terrain.draw(screen, SCREEN_HEIGHT, camera)
 
-            if lander:
-                lander.draw(screen, SCREEN_HEIGHT)
-            else:
-                # Draw debris
-                for body in physics_space.space.bodies:
-                    if body.body_type == pymunk.Body.DYNAMIC:
-                        for shape in body.shapes:
-                            if isinstance(shape, pymunk.Poly):
-                                points = []
-                                for v in shape.get_vertices():
-                                    p_world = body.local_to_world(v)
-                                    points.append(to_pygame(p_world, SCREEN_HEIGHT))
-                                pygame.draw.polygon(screen, shape.color, points, 0)
-
-            # Draw Game Over Menu
-            stats = None
-            if result_text == "CRASHED!":
-                stats = {
-                    "fuel": crash_fuel,
-                    "vx": crash_vel.x,
-                    "vy": crash_vel.y,
-                    "angle": crash_angle,
-                }
-            game_over_menu.draw(screen, result_text, stats)
+                if lander:
+                    lander.draw(screen, SCREEN_HEIGHT, camera=camera)
+                else:
+                    physics_space.debris.draw(screen, SCREEN_HEIGHT, camera=camera)
+
+                # Draw Game Over Menu
+                stats = None
+                if result_text == "CRASHED!":
+                    stats = {
+                        "fuel": crash_fuel,
+                        "vx": crash_vel.x,
+                        "vy": crash_vel.y,
+                        "angle": crash_angle,
+                    }
+                game_over_menu.draw(screen, result_text, stats)
 
             action = game_over_menu.handle_input(events)
             if action == "RESTART":
                 state = "GAME"
-                physics_space, terrain, lander = start_game(menu.gravity, menu.difficulty)
+                effects_seed = random.randrange(2**32)
+                world = start_game(menu.gravity, menu.difficulty, world, effects_seed)
+                physics_space, terrain, lander = world
+                recorder = start_recording(menu.gravity, substeps, terrain, lander, effects_seed)
+                telemetry.clear()
+                camera.reset(terrain.extent)
                 mouse_origin_y = pygame.mouse.get_pos()[1]
                 total_time = 0.0
+                accumulator = 0.0
+                previous_pose = None
             elif action == "MENU":
                 state = "MENU"
 
-        pygame.display.flip()
-        clock.tick(fps)
-
+        with profiler.phase("flip"):
+            renderer.flip()
+        profiler.end_frame()
+        drawn_state = frame_state
+
+        if hud is None:
+            # The menu is on screen; load and convert everything the game draws with. The first
+            # frame always shows the menu, so this is done before a flight can start.
+            startup.mark("first frame")
+            assets.preload(images=[("lander.png", LANDER_SIZE)])
+            hud = HUD()
+            game_over_menu = GameOverMenu()
+            if app_config.sprite_cache == "eager":
+                get_rotation_cache().build()
+            startup.mark("deferred loading")
+            assets.report(verbose=app_config.debug)
+            if args.startup_report:
+                startup.report()
+
+    if recorder:
+        finish_recording(log_writer, recorder, "aborted", lander)
+
+    if app_config.debug:
+        stats = get_rotation_cache().stats()
+        print(
+            "Sprite rotation cache: {hits} hits, {misses} misses ({hit_rate:.1%}), "
+            "{entries} surfaces".format(**stats)
+        )
+    if profiler.enabled:
+        profiler.dump(app_config.trace_file)
+
+    log_writer.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,190 @@
+import random
+
+import numpy as np
+import pygame
+
+explosion_palette = [
+    (255, 200, 100),  # hot white core (still bright but reduced)
+    (255, 180, 80),
+    (255, 160, 60),
+    (255, 140, 40),
+    (255, 120, 30),
+    (255, 100, 20),
+    (240, 90, 15),
+    (220, 80, 10),
+    (200, 70, 8),
+    (180, 65, 5),  # strong dark orange
+    (160, 60, 5),
+    (140, 55, 5),
+    (120, 50, 5),  # deep red-orange
+    (100, 45, 5),
+    (90, 40, 5),
+    (80, 35, 5),
+    (70, 30, 8),  # very dark red with slight purple hint
+    (60, 25, 8),
+    (50, 20, 10),
+    (40, 15, 10),  # almost black, perfect for smoke/fade-out]
+]
+
+# Bounce off the terrain: the product of the old pymunk debris (0.8) and terrain (0.5) elasticity
+RESTITUTION = 0.4
+# Fraction of tangential and spin velocity kept on each ground contact
+GROUND_FRICTION = 0.8
+# Resting pieces slower than this (px/s) for SLEEP_STEPS steps stop being simulated
+SLEEP_SPEED = 3.0
+SLEEP_STEPS = 10
+# Pieces that leave the terrain by this margin (below or to either side) are recycled
+KILL_MARGIN = 200
+# Degrees between the pre-rendered rotations of a piece. Pieces are square, so 0-90 covers all.
+ROTATION_STEP = 10
+
+
+class DebrisField:
+    """Crash debris as a fixed pool of square particles held in NumPy arrays.
+
+    Debris never enters the pymunk space. Pieces fall under gravity, bounce off the terrain
+    polyline, go to sleep once they come to rest and are drawn with one Surface.blits call of
+    sprites pre-rendered per size, color and rotation step.
+    """
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.angle = np.zeros(capacity)
+        self.angular_velocity = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.asleep = np.zeros(capacity, dtype=bool)
+        self.rest_steps = np.zeros(capacity, dtype=np.int32)
+
+        self.ground_x = np.array([0.0, 1.0])
+        self.ground_y = np.zeros(2)
+        # (size, color, outline width, rotation step) -> rotated square surface
+        self._sprites = {}
+
+    def set_ground(self, xs, ys):
+        self.ground_x = np.asarray(xs, dtype=np.float64)
+        self.ground_y = np.asarray(ys, dtype=np.float64)
+
+    @property
+    def active(self):
+        return bool(self.alive.any())
+
+    def clear(self):
+        self.alive[:] = False
+        self.asleep[:] = False
+
+    def spawn_explosion(self, position, velocity, count=99, rng=random):
+        """Scatter count pieces from position, bigger pieces flying faster like Lander.explode did."""
+        free = np.flatnonzero(~self.alive)[:count]
+        for i, slot in enumerate(free):
+            n = i + 1
+            vel_factor = 5
+            self.x[slot] = position[0]
+            self.y[slot] = position[1]
+            self.vx[slot] = velocity[0] + rng.uniform(-vel_factor * n, vel_factor * n)
+            self.vy[slot] = velocity[1] + rng.uniform(0, vel_factor * n)
+            self.angle[slot] = 0.0
+            self.angular_velocity[slot] = rng.uniform(-10, 10)
+            self.size[slot] = int(n / 15.0) + 1
+            self.color[slot] = rng.choice(explosion_palette)
+        self.alive[free] = True
+        self.asleep[free] = False
+        self.rest_steps[free] = 0
+
+    def step(self, dt, gravity):
+        moving = self.alive & ~self.asleep
+        if not moving.any():
+            return
+        idx = np.flatnonzero(moving)
+
+        vx = self.vx[idx]
+        vy = self.vy[idx] - gravity * dt
+        x = self.x[idx] + vx * dt
+        y = self.y[idx] + vy * dt
+        w = self.angular_velocity[idx]
+        self.angle[idx] += w * dt
+
+        # Collide against the terrain surface under each piece
+        half = self.size[idx] / 2
+        ground = np.interp(x, self.ground_x, self.ground_y)
+        hit = y - half < ground
+        if hit.any():
+            seg = np.clip(np.searchsorted(self.ground_x, x[hit]) - 1, 0, len(self.ground_x) - 2)
+            dx = self.ground_x[seg + 1] - self.ground_x[seg]
+            dy = self.ground_y[seg + 1] - self.ground_y[seg]
+            length = np.hypot(dx, dy)
+            length = np.where(length > 0, length, 1.0)
+            nx, ny = -dy / length, dx / length
+
+            vn = vx[hit] * nx + vy[hit] * ny
+            tx, ty = vx[hit] - vn * nx, vy[hit] - vn * ny
+            vn = np.where(vn < 0, -vn * RESTITUTION, vn)
+            vx[hit] = (tx * GROUND_FRICTION) + vn * nx
+            vy[hit] = (ty * GROUND_FRICTION) + vn * ny
+            y[hit] = ground[hit] + half[hit]
+            w[hit] *= GROUND_FRICTION
+
+        # Sleep pieces that have been slow and within a pixel of the ground for a while. Small
+        # bounces mean a resting piece doesn't overlap the surface on every step.
+        resting = (y - half - ground < 1.0) & (np.hypot(vx, vy) < SLEEP_SPEED)
+        rest_steps = np.where(resting, self.rest_steps[idx] + 1, 0)
+        sleeping = rest_steps >= SLEEP_STEPS
+        vx[sleeping] = 0.0
+        vy[sleeping] = 0.0
+        w[sleeping] = 0.0
+
+        self.x[idx] = x
+        self.y[idx] = y
+        self.vx[idx] = vx
+        self.vy[idx] = vy
+        self.angular_velocity[idx] = w
+        self.rest_steps[idx] = rest_steps
+        self.asleep[idx] = sleeping
+        self.alive[idx] = (
+            (y > -KILL_MARGIN)
+            & (x > self.ground_x[0] - KILL_MARGIN)
+            & (x < self.ground_x[-1] + KILL_MARGIN)
+        )
+
+    def _sprite(self, size, color, width, step):
+        key = (size, color, width, step)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            square = pygame.Surface((size + 1, size + 1), pygame.SRCALPHA)
+            pygame.draw.rect(square, color, square.get_rect(), width)
+            sprite = pygame.transform.rotate(square, step * ROTATION_STEP)
+            self._sprites[key] = sprite
+        return sprite
+
+    def draw(self, screen, height, color=None, width=0, camera=None):
+        """Draw every live piece. Uses each piece's own color unless color is given."""
+        idx = np.flatnonzero(self.alive)
+        if not len(idx):
+            return []
+
+        x = self.x[idx]
+        if camera is not None:
+            x = x - camera.offset
+        y = height - self.y[idx]
+        steps = np.rint(np.degrees(self.angle[idx]) / ROTATION_STEP).astype(int)
+        steps %= 90 // ROTATION_STEP
+        sizes = self.size[idx].astype(int).tolist()
+        if color is None:
+            colors = map(tuple, self.color[idx].tolist())
+        else:
+            colors = [tuple(color)] * len(idx)
+
+        blits = []
+        sprite = self._sprite
+        for cx, cy, size, piece_color, step in zip(
+            x.tolist(), y.tolist(), sizes, colors, steps.tolist()
+        ):
+            surface = sprite(size, piece_color, width, step)
+            # Rotated sprites grow, so centre each one on its piece
+            blits.append((surface, (cx - surface.get_width() // 2, cy - surface.get_height() // 2)))
+        return screen.blits(blits)
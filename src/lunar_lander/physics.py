@@ -1,6 +1,15 @@
 import math
 import pymunk
 
+from .events import Crashed, Landed, LandingEvaluated, events
+from .particles import DebrisField
+
+# Apollo LM landing envelope used by PhysicsWorld.doghouse_safe_landing
+MAX_VV = 3.05  # m/s, downward
+MAX_VH = 1.22  # m/s, horizontal
+VV_KNEE = 2.13  # above this the allowed horizontal velocity falls linearly to 0 at MAX_VV
+MAX_TILT_DEG = 12.0
+
 
 class PhysicsWorld:
     def __init__(self, gravity):
@@ -14,8 +23,15 @@ class PhysicsWorld:
             self.COLLISION_LANDER, self.COLLISION_TERRAIN, begin=self.handle_collision
         )
 
+        # Crash debris lives outside the pymunk space so it never loads the broadphase
+        self.debris = DebrisField()
+        # TerrainIndex for pad bounds, see set_terrain
+        self.terrain_index = None
+
         self.landed = False
         self.crashed = False
+        # vh/vv/tilt at first touchdown, kept for the crash screen and sweep tools
+        self.impact = None
 
     def handle_collision(self, arbiter, space, data):
         # Get shapes
@@ -37,47 +53,70 @@ class PhysicsWorld:
         vv = abs(body.velocity.y)
         vh = abs(body.velocity.x)
         total_tilt_deg = math.degrees(body.angle)
-
-        self.crashed = not self.doghouse_safe_landing(vv, vh, total_tilt_deg)
-
-        if self.crashed:
-            print(f"CRASHED! vh={vh:.1f}, vv={vv:.1f}, angle={total_tilt_deg:.2f}")
-            return True
-
-        # Check if terrain is pad
         is_pad = getattr(terrain, "is_pad", False)
-        safe_position = False
-        if is_pad:
+        self.impact = {"vh": vh, "vv": vv, "tilt": total_tilt_deg, "is_pad": is_pad}
+
+        # Check the envelope first, then that both feet are on one pad
+        reason = landing_violation(vv, vh, total_tilt_deg)
+        pad = None
+        if reason is None and not is_pad:
+            reason = "Off pad"
+        elif reason is None:
             # Check if lander is fully within pad bounds
-            # Pad is a segment from a to b
-            pad_l = min(terrain.a.x, terrain.b.x)
-            pad_r = max(terrain.a.x, terrain.b.x)
             leg_l = body.local_to_world(body.left_foot.a).x
             leg_r = body.local_to_world(body.right_foot.a).x
-
-            if leg_l >= pad_l and leg_r <= pad_r:
-                safe_position = True
-            else:
-                print(
-                    "Missed pad bounds: Pad({pad_l:.1f}, {pad_r:.1f}) Lander({leg_l:.1f}, {leg_r:.1f})"
+            # The index knows the whole pad even when it is made of several segments
+            if self.terrain_index is not None:
+                pad = self.terrain_index.pad_at((leg_l + leg_r) / 2)
+            if pad is None:
+                # Pad is a segment from a to b
+                pad = (min(terrain.a.x, terrain.b.x), max(terrain.a.x, terrain.b.x))
+            pad_l, pad_r = pad
+            if leg_l < pad_l or leg_r > pad_r:
+                reason = (
+                    f"Missed pad bounds: Pad({pad_l:.1f}, {pad_r:.1f}) "
+                    f"Lander({leg_l:.1f}, {leg_r:.1f})"
                 )
 
-        if is_pad and safe_position:
+        # Publishing only hands the events to subscribers; nothing here waits on I/O
+        events.publish(LandingEvaluated(vv, vh, total_tilt_deg, is_pad, reason))
+        if reason is None:
             self.landed = True
-            print("LANDED SAFE!")
+            events.publish(Landed(vv, vh, total_tilt_deg, pad))
         else:
             self.crashed = True
-            print(
-                f"CRASHED OFF PAD! vx={vh:.1f}, vy={vv:.1f}, angle={total_tilt_deg:.2f}, pad={is_pad}, pos={safe_position}"
-            )
-
+            events.publish(Crashed(vv, vh, total_tilt_deg, is_pad, reason))
         return True
 
+    def reset(self, gravity=None):
+        """Clear the flight outcome and debris, keeping the space, handler and static terrain."""
+        if gravity is not None:
+            self.set_gravity(gravity)
+        self.landed = False
+        self.crashed = False
+        self.impact = None
+        self.debris.clear()
+
+    def set_terrain(self, terrain):
+        """Use terrain's polyline for pad bounds and debris collisions."""
+        xs, ys, _ = terrain.polyline()
+        self.debris.set_ground(xs, ys)
+        self.terrain_index = terrain.index
+
     def set_gravity(self, val):
         self.space.gravity = (0.0, -val)
 
-    def step(self, dt):
-        self.space.step(dt)
+    def step(self, dt, substeps=1):
+        """Advance dt seconds, optionally split into smaller pymunk steps for stiffer contacts."""
+        if substeps <= 1:
+            self.space.step(dt)
+        else:
+            sub_dt = dt / substeps
+            for _ in range(substeps):
+                self.space.step(sub_dt)
+
+        if self.debris.active:
+            self.debris.step(dt, -self.space.gravity.y)
 
     def doghouse_safe_landing(self, vv_ms, vh_ms, total_tilt_deg):
         """
@@ -87,19 +126,25 @@ class PhysicsWorld:
         total_tilt_deg = math.degrees(math.atan2(  # or from pitch/roll
             math.sqrt(body_pitch_rad**2 + body_roll_rad**2), 1))
         """
-        # Velocity Doghouse (unchanged)
-        if vv_ms > 3.05 or vh_ms > 1.22:
-            print(f"vv_ms ({vv_ms}) > 3.05 or vh_ms ({vh_ms}) > 1.22")
-            return False
-        if vv_ms <= 2.13:
-            max_vh = 1.22
-        else:  # Linear to 0 at 3.05 m/s
-            max_vh = (4.0 / 3.0) * (3.05 - vv_ms)
-        if vh_ms > max_vh:
-            print(f"vh_ms ({vh_ms}) > max_vh ({max_vh})")
-            return False
-        # Tilt limit
-        if total_tilt_deg > 12.0:
-            print(f"total_tilt_deg ({total_tilt_deg}) > 12.0")
-            return False
-        return True
+        return landing_violation(vv_ms, vh_ms, total_tilt_deg) is None
+
+
+def landing_violation(vv_ms, vh_ms, total_tilt_deg):
+    """Why a touchdown at these speeds and tilt is outside the envelope, or None if it is safe.
+
+    The check behind PhysicsWorld.doghouse_safe_landing, for callers that want the reason, like
+    the collision handler, or evaluate many touchdowns, like the trajectory prediction.
+    """
+    # Velocity Doghouse (unchanged)
+    if vv_ms > MAX_VV or vh_ms > MAX_VH:
+        return f"vv_ms ({vv_ms}) > {MAX_VV} or vh_ms ({vh_ms}) > {MAX_VH}"
+    if vv_ms <= VV_KNEE:
+        max_vh = MAX_VH
+    else:  # Linear to 0 at 3.05 m/s
+        max_vh = (4.0 / 3.0) * (MAX_VV - vv_ms)
+    if vh_ms > max_vh:
+        return f"vh_ms ({vh_ms}) > max_vh ({max_vh})"
+    # Tilt limit
+    if total_tilt_deg > MAX_TILT_DEG:
+        return f"total_tilt_deg ({total_tilt_deg}) > {MAX_TILT_DEG}"
+    return None
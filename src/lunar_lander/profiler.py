@@ -0,0 +1,170 @@
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+from .assets import assets
+from .ui import text_cache
+from .utils import WHITE, YELLOW
+
+# One shared do-nothing context returned by a disabled profiler
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    """Times one named phase. Reused for every frame, so timing allocates nothing per call."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.profiler._record(self.name, self.start, end)
+        return False
+
+
+class FrameProfiler:
+    """Per-frame timings of the main loop's phases, plus physics shape and arbiter counts.
+
+    Wrap each phase in `with profiler.phase(name):` and bracket the frame with begin_frame and
+    end_frame. The last `history` frames are kept for rolling percentiles and every phase is
+    logged for a Chrome trace (chrome://tracing or ui.perfetto.dev). A disabled profiler hands out
+    a shared no-op context, so the instrumentation can stay in the loop.
+    """
+
+    def __init__(self, enabled=False, history=300, max_events=500000):
+        self.enabled = enabled
+        self.history = history
+        self._phases = {}
+        # name -> times (ms) of that phase in each of the last `history` frames it ran in
+        self.samples = {}
+        self._frame = {}
+        self._frame_start = 0
+        self._origin = time.perf_counter_ns()
+        # (name, start ns, duration ns) for phases and (None, time ns, counters) for step counts
+        self.events = deque(maxlen=max_events)
+        self.shapes = 0
+        self.arbiters = 0
+        self._overlay = []
+        self._overlay_frames = 0
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def _record(self, name, start, end):
+        self._frame[name] = self._frame.get(name, 0) + (end - start)
+        self.events.append((name, start, end - start))
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame.clear()
+            self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        end = time.perf_counter_ns()
+        self._record("frame", self._frame_start, end)
+        for name, ns in self._frame.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.history)
+            samples.append(ns / 1e6)
+
+    def count_step(self, space):
+        """Log the shapes and contact arbiters in the space after a physics step."""
+        if not self.enabled:
+            return
+        arbiters = []
+        for body in space.bodies:
+            body.each_arbiter(arbiters.append)
+        self.shapes = len(space.shapes)
+        self.arbiters = len(arbiters)
+        self.events.append((None, time.perf_counter_ns(), (self.shapes, self.arbiters)))
+
+    def percentiles(self, name, q=(50, 95, 99)):
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        return np.percentile(np.fromiter(samples, float, len(samples)), q)
+
+    def draw(self, screen, refresh=15):
+        """Blit the percentile table in the bottom-left corner and return the rects drawn.
+
+        The numbers are recomputed every `refresh` frames so the overlay barely shows up in them.
+        """
+        if not self.enabled:
+            return []
+
+        if not self._overlay or self._overlay_frames >= refresh:
+            lines = [("phase            p50     p95     p99 ms", YELLOW)]
+            order = sorted(self.samples, key=lambda name: (name == "frame", name))
+            for name in order:
+                p50, p95, p99 = self.percentiles(name)
+                lines.append((f"{name:<12} {p50:7.2f} {p95:7.2f} {p99:7.2f}", WHITE))
+            lines.append((f"shapes {self.shapes}  arbiters {self.arbiters}", WHITE))
+            self._overlay = lines
+            self._overlay_frames = 0
+        self._overlay_frames += 1
+
+        font = assets.font("profiler")
+        line_height = font.get_linesize()
+        y = screen.get_height() - 10 - line_height * len(self._overlay)
+        rects = []
+        for i, (text, color) in enumerate(self._overlay):
+            surface = text_cache.render(font, text, color)
+            rects.append(screen.blit(surface, (10, y + i * line_height)))
+        return rects
+
+    def dump(self, path):
+        """Write the logged events as a Chrome trace JSON file."""
+        trace = []
+        for name, start, value in self.events:
+            ts = (start - self._origin) / 1000
+            if name is None:
+                shapes, arbiters = value
+                args = {"shapes": shapes, "arbiters": arbiters}
+                trace.append({"name": "space", "ph": "C", "ts": ts, "pid": 0, "args": args})
+            else:
+                trace.append(
+                    {"name": name, "ph": "X", "ts": ts, "dur": value / 1000, "pid": 0, "tid": 0}
+                )
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        print(f"Profiler trace ({len(trace)} events) written to {path}")
+
+
+class StartupTimer:
+    """Wall time of each step from launch to the game being ready, for --startup-report."""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        self.steps = []
+
+    def mark(self, label):
+        """Record the time since the previous mark as label."""
+        now = time.perf_counter()
+        self.steps.append((label, now - self._last))
+        self._last = now
+
+    def report(self):
+        total = self._last - self.start
+        print(f"Startup took {total * 1000:.1f} ms")
+        for label, seconds in self.steps:
+            print(f"  {label:<24} {seconds * 1000:8.1f} ms  {seconds / total:6.1%}")
@@ -0,0 +1,71 @@
+import os
+
+import pygame
+
+from .utils import app_config
+
+
+class DirtyRenderer:
+    """Pushes only the screen regions that changed to the display.
+
+    Each frame the caller erases what it drew last frame (erase), draws the moving parts and
+    registers their rects (add), then calls flip. A full flip happens after invalidate, e.g. when
+    the game state changes, and on every frame when the renderer is disabled.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.full_redraw = True
+        self._previous = []
+        self._current = []
+
+    @property
+    def incremental(self):
+        """True when this frame may be drawn on top of the last one instead of from scratch."""
+        return self.enabled and not self.full_redraw
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def erase(self, screen, background):
+        """Paint the background back over everything drawn last frame."""
+        for rect in self._previous:
+            screen.blit(background, rect, rect)
+
+    def add(self, rects):
+        if isinstance(rects, pygame.Rect):
+            self._current.append(rects)
+        else:
+            self._current.extend(rects)
+
+    def flip(self):
+        if not self.enabled or self.full_redraw:
+            pygame.display.flip()
+        elif self._previous or self._current:
+            pygame.display.update(self._previous + self._current)
+        self.full_redraw = False
+        self._previous = self._current
+        self._current = []
+
+
+def open_display(width, height, caption):
+    """Open the window, or an offscreen display when headless, as the settings ask."""
+    if app_config.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        # Takes effect on the next display init, whether or not pygame.init already ran
+        pygame.display.quit()
+    pygame.display.init()
+
+    scale = app_config.render_scale
+    flags = 0
+    if app_config.vsync or scale != 1:
+        # SDL only honours vsync for the SCALED/OPENGL renderers, and SCALED lets the GPU stretch
+        # the frame to any window size while mouse positions stay in game coordinates
+        flags = pygame.SCALED
+    screen = pygame.display.set_mode((width, height), flags, vsync=int(bool(app_config.vsync)))
+    if scale != 1 and not app_config.headless:
+        from pygame._sdl2.video import Window
+
+        Window.from_display_module().size = (round(width * scale), round(height * scale))
+    pygame.display.set_caption(caption)
+    return screen
@@ -0,0 +1,402 @@
+"""Flight recordings and the replay engine.
+
+A recording holds everything needed to fly a game again step for step: the world settings and
+seeds, then the pilot input of every physics step. A hash of the lander state is stored every
+checkpoint_every steps and after the last step, so a replay finds the first checkpoint where a
+physics change makes a flight diverge.
+
+    header       HEADER below, followed by the terrain file path as UTF-8
+    throttle     float64[steps]
+    rotation     int8[steps]
+    dt           float64[steps]
+    checkpoints  uint64[steps // checkpoint_every + 1], the last taken after the final step
+
+All fields are little-endian. Input is kept at full precision because rounding it would change the
+flight.
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .events import Log, events
+from .simulation import Simulation
+from .utils import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, app_config, data_dir
+
+MAGIC = b"LLRC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIHHddddqqq8sH")
+RECORDING_SUFFIX = ".llr"
+OUTCOMES = ("aborted", "landed", "crashed")
+STATE = struct.Struct("<7d")
+
+
+class RecordingFormatError(ValueError):
+    pass
+
+
+def state_hash(lander):
+    """64-bit hash of the lander's exact position, velocity, attitude and fuel."""
+    body = lander.body
+    state = STATE.pack(
+        body.position.x,
+        body.position.y,
+        body.velocity.x,
+        body.velocity.y,
+        body.angle,
+        body.angular_velocity,
+        lander.fuel_remaining,
+    )
+    return int.from_bytes(hashlib.blake2b(state, digest_size=8).digest(), "little")
+
+
+def terrain_hash(terrain):
+    """Fingerprint of the terrain loaded at the start of a flight."""
+    digest = hashlib.blake2b(digest_size=8)
+    for array, dtype in zip(terrain.polyline(), ("<f8", "<f8", "?")):
+        digest.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+    return digest.digest()
+
+
+class Recording:
+    """One flight: the settings it started from and the input of every physics step."""
+
+    def __init__(
+        self,
+        gravity,
+        difficulty,
+        starting_fuel,
+        spawn,
+        substeps=1,
+        terrain_seed=None,
+        effects_seed=None,
+        world_width=None,
+        terrain_file=None,
+        terrain_hash=b"",
+        checkpoint_every=30,
+    ):
+        self.gravity = gravity
+        self.difficulty = difficulty
+        self.starting_fuel = starting_fuel
+        self.spawn = (float(spawn[0]), float(spawn[1]))
+        self.substeps = substeps
+        self.terrain_seed = terrain_seed
+        self.effects_seed = effects_seed
+        self.world_width = world_width
+        self.terrain_file = str(terrain_file) if terrain_file else None
+        self.terrain_hash = terrain_hash
+        self.checkpoint_every = checkpoint_every
+        self.outcome = "aborted"
+        self.throttle = np.zeros(0)
+        self.rotation = np.zeros(0, dtype=np.int8)
+        self.dt = np.zeros(0)
+        self.checkpoints = np.zeros(0, dtype=np.uint64)
+
+    @property
+    def steps(self):
+        return len(self.throttle)
+
+    @property
+    def duration(self):
+        return float(self.dt.sum())
+
+    def simulation(self):
+        """A headless Simulation set up exactly as the recorded flight started."""
+        return Simulation(
+            self.gravity,
+            self.difficulty,
+            self.starting_fuel,
+            spawn=self.spawn,
+            world_width=self.world_width,
+            terrain_seed=self.terrain_seed,
+            terrain_file=self.terrain_file,
+            substeps=self.substeps,
+            effects_seed=self.effects_seed,
+        )
+
+    def save(self, path):
+        path_bytes = (self.terrain_file or "").encode("utf-8")
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            OUTCOMES.index(self.outcome),
+            self.steps,
+            self.checkpoint_every,
+            self.difficulty,
+            self.substeps,
+            self.gravity,
+            self.starting_fuel,
+            self.spawn[0],
+            self.spawn[1],
+            -1 if self.terrain_seed is None else self.terrain_seed,
+            -1 if self.effects_seed is None else self.effects_seed,
+            -1 if self.world_width is None else self.world_width,
+            self.terrain_hash.ljust(8, b"\0"),
+            len(path_bytes),
+        )
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(path_bytes)
+            f.write(np.asarray(self.throttle, dtype="<f8").tobytes())
+            f.write(np.asarray(self.rotation, dtype="<i1").tobytes())
+            f.write(np.asarray(self.dt, dtype="<f8").tobytes())
+            f.write(np.asarray(self.checkpoints, dtype="<u8").tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise RecordingFormatError(f"{path}: truncated header")
+        (
+            magic,
+            version,
+            outcome,
+            steps,
+            checkpoint_every,
+            difficulty,
+            substeps,
+            gravity,
+            starting_fuel,
+            spawn_x,
+            spawn_y,
+            terrain_seed,
+            effects_seed,
+            world_width,
+            terrain_digest,
+            path_len,
+        ) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise RecordingFormatError(f"{path}: not a flight recording")
+        if version != VERSION:
+            raise RecordingFormatError(f"{path}: unsupported recording version {version}")
+
+        offset = HEADER.size
+        terrain_file = data[offset : offset + path_len].decode("utf-8") or None
+        offset += path_len
+        num_checkpoints = steps // checkpoint_every + 1
+        expected = offset + steps * (8 + 1 + 8) + num_checkpoints * 8
+        if len(data) < expected:
+            raise RecordingFormatError(f"{path}: truncated, expected {steps} steps")
+
+        recording = cls(
+            gravity,
+            difficulty,
+            starting_fuel,
+            (spawn_x, spawn_y),
+            substeps,
+            None if terrain_seed < 0 else terrain_seed,
+            None if effects_seed < 0 else effects_seed,
+            None if world_width < 0 else world_width,
+            terrain_file,
+            terrain_digest,
+            checkpoint_every,
+        )
+        recording.outcome = OUTCOMES[outcome]
+        recording.throttle = np.frombuffer(data, "<f8", steps, offset)
+        offset += 8 * steps
+        recording.rotation = np.frombuffer(data, "<i1", steps, offset)
+        offset += steps
+        recording.dt = np.frombuffer(data, "<f8", steps, offset)
+        offset += 8 * steps
+        recording.checkpoints = np.frombuffer(data, "<u8", num_checkpoints, offset)
+        return recording
+
+
+class Recorder:
+    """Collects a flight step by step. finish() seals it into its Recording."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.throttle = []
+        self.rotation = []
+        self.dt = []
+        self.checkpoints = []
+        self._last_hash = None
+
+    def record(self, throttle_pct, rotation, dt, lander):
+        """Log one physics step. Call after the step, with the input that was applied."""
+        self.throttle.append(throttle_pct)
+        self.rotation.append(rotation)
+        self.dt.append(dt)
+        self._last_hash = state_hash(lander)
+        if len(self.throttle) % self.recording.checkpoint_every == 0:
+            self.checkpoints.append(self._last_hash)
+
+    def finish(self, outcome, lander=None):
+        """Set the outcome and final checkpoint. lander is only needed if no step was recorded."""
+        recording = self.recording
+        final = self._last_hash if self._last_hash is not None else state_hash(lander)
+        recording.outcome = outcome
+        recording.throttle = np.array(self.throttle, dtype=np.float64)
+        recording.rotation = np.array(self.rotation, dtype=np.int8)
+        recording.dt = np.array(self.dt, dtype=np.float64)
+        recording.checkpoints = np.array(self.checkpoints + [final], dtype=np.uint64)
+        return recording
+
+
+def recordings_dir():
+    return Path(app_config.recordings_dir or Path(data_dir()) / "recordings")
+
+
+def save_flight(recording):
+    """Write a finished recording to the recordings directory and return its path."""
+    directory = recordings_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    path = directory / f"flight_{stamp}_{recording.outcome}{RECORDING_SUFFIX}"
+    suffix = 1
+    while path.exists():
+        suffix += 1
+        path = directory / f"flight_{stamp}_{recording.outcome}_{suffix}{RECORDING_SUFFIX}"
+    recording.save(path)
+    events.publish(Log(f"Flight recorded to {path}"))
+    return path
+
+
+def replay(recording, on_step=None):
+    """Fly a recording again and check it against its checkpoints.
+
+    on_step(simulation) is called after every step, e.g. to draw it. Returns a dict with the
+    outcome, the number of steps flown and a list of mismatches, empty when the replay matched.
+    """
+    started = time.perf_counter()
+    sim = recording.simulation()
+    mismatches = []
+    if recording.terrain_hash.strip(b"\0") and terrain_hash(sim.terrain) != recording.terrain_hash:
+        mismatches.append("terrain differs from the recorded flight")
+
+    every = recording.checkpoint_every
+    throttle = recording.throttle.tolist()
+    rotation = recording.rotation.tolist()
+    dt = recording.dt.tolist()
+    checkpoints = recording.checkpoints.tolist()
+    steps = 0
+    for i in range(recording.steps):
+        if sim.done:
+            mismatches.append(f"flight ended at step {steps}, recording has {recording.steps}")
+            break
+        sim.step(throttle[i], rotation[i], dt[i])
+        steps += 1
+        if steps % every == 0:
+            if state_hash(sim.lander) != checkpoints[steps // every - 1]:
+                mismatches.append(f"state differs at step {steps}")
+                break
+        if on_step is not None:
+            on_step(sim)
+
+    outcome = "landed" if sim.landed else "crashed" if sim.crashed else "aborted"
+    if not mismatches:
+        if state_hash(sim.lander) != checkpoints[-1]:
+            mismatches.append(f"final state differs at step {steps}")
+        if outcome != recording.outcome:
+            mismatches.append(f"outcome {outcome}, recorded {recording.outcome}")
+
+    return {
+        "steps": steps,
+        "outcome": outcome,
+        "mismatches": mismatches,
+        "simulation": sim,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def play(recording, speed=1.0):
+    """Replay a recording in a window at speed times real time, or as fast as possible if 0."""
+    import pygame
+    from .camera import Camera
+    from .render import open_display
+    from .ui import HUD
+
+    pygame.init()
+    screen = open_display(SCREEN_WIDTH, SCREEN_HEIGHT, "Lunar Lander replay")
+    clock = pygame.time.Clock()
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+    hud = HUD()
+    fps = speed / recording.dt[0] if speed and recording.steps else 0
+
+    def draw(sim, lander=True):
+        # The simulation streams terrain around the lander, which covers everything in view
+        terrain = sim.terrain
+        camera.extent = terrain.extent
+        if lander:
+            camera.follow(sim.lander.body.position.x)
+        terrain.draw(screen, SCREEN_HEIGHT, camera)
+        if lander:
+            sim.lander.draw(screen, SCREEN_HEIGHT, camera=camera)
+            hud.draw(
+                screen,
+                sim.lander.get_velocity(),
+                sim.lander.fuel_remaining,
+                sim.lander.fuel_capacity,
+                sim.lander.get_altitude(terrain.index),
+                sim.lander.throttle_pct,
+                sim.time,
+            )
+        else:
+            sim.physics.debris.draw(screen, SCREEN_HEIGHT, WHITE, 2, camera)
+        pygame.display.flip()
+        clock.tick(fps)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                raise KeyboardInterrupt
+
+    result = replay(recording, draw)
+    sim = result["simulation"]
+    if sim.crashed:
+        # Let the debris settle for a couple of seconds like the game does
+        sim.lander.explode(sim.physics.debris)
+        for _ in range(int(2.0 / sim.dt)):
+            sim.physics.step(sim.dt)
+            draw(sim, lander=False)
+    # The display stays open for the next recording; fonts cached by the asset manager die with it
+    return result
+
+
+def find_recordings(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(Path(path).glob(f"*{RECORDING_SUFFIX}"))
+        else:
+            yield Path(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and verify recorded flights")
+    parser.add_argument("paths", nargs="*", help="Recordings or directories of them")
+    parser.add_argument("--render", action="store_true", help="Show the replay in a window")
+    parser.add_argument("--speed", type=float, default=1.0, help="With --render, 0 for max speed")
+    args = parser.parse_args()
+
+    failed = 0
+    total = 0
+    started = time.perf_counter()
+    for path in find_recordings(args.paths or [recordings_dir()]):
+        recording = Recording.load(path)
+        if args.render:
+            result = play(recording, args.speed)
+        else:
+            result = replay(recording)
+        total += 1
+        if result["mismatches"]:
+            failed += 1
+            print(f"FAIL {path}: {'; '.join(result['mismatches'])}")
+        else:
+            print(
+                f"ok   {path}: {result['outcome']} after {result['steps']} steps "
+                f"({recording.duration:.1f}s flight) in {result['elapsed'] * 1000:.0f} ms"
+            )
+
+    elapsed = time.perf_counter() - started
+    print(f"{total - failed}/{total} recordings replayed identically in {elapsed:.2f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
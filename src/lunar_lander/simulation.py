@@ -0,0 +1,120 @@
+from .physics import PhysicsWorld
+from .lander import Lander
+from .terrain import Terrain
+from .utils import GRAVITY_MOON, SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class Simulation:
+    """A single flight stepped without a display.
+
+    Builds the same PhysicsWorld, Terrain and Lander as the game but never opens a window, loads
+    fonts or the lander sprite, and is stepped as fast as the caller wants instead of at the
+    frame rate.
+    """
+
+    def __init__(
+        self,
+        gravity=GRAVITY_MOON,
+        difficulty=1,
+        starting_fuel=0.1,
+        spawn=None,
+        width=SCREEN_WIDTH,
+        height=SCREEN_HEIGHT,
+        dt=1.0 / 30,
+        world_width=None,
+        terrain_seed=None,
+        terrain_file=None,
+        substeps=1,
+        effects_seed=None,
+    ):
+        self.width = width
+        self.height = height
+        self.dt = dt
+        self.substeps = substeps
+        self.spawn = spawn if spawn is not None else (width // 5, height - 100)
+        self.physics = PhysicsWorld(gravity)
+        self.terrain = Terrain(
+            self.physics.space,
+            width,
+            height,
+            difficulty,
+            seed=terrain_seed,
+            world_width=world_width,
+            terrain_file=terrain_file,
+        )
+        self.lander = Lander(
+            self.physics.space, pos=self.spawn, starting_fuel=starting_fuel, seed=effects_seed
+        )
+        self.physics.set_terrain(self.terrain)
+        self.steps = 0
+        self.time = 0.0
+
+    def reset(
+        self, gravity=None, difficulty=None, starting_fuel=None, spawn=None, effects_seed=None
+    ):
+        """Start a new flight in the same world. Arguments left as None keep their last value."""
+        if spawn is not None:
+            self.spawn = spawn
+        self.physics.reset(gravity)
+        self.terrain.reset(difficulty)
+        self.physics.set_terrain(self.terrain)
+        self.lander.reset(self.spawn, starting_fuel, effects_seed)
+        self.steps = 0
+        self.time = 0.0
+
+    @property
+    def landed(self):
+        return self.physics.landed
+
+    @property
+    def crashed(self):
+        return self.physics.crashed
+
+    @property
+    def done(self):
+        return self.physics.landed or self.physics.crashed
+
+    def step(self, throttle_pct=0.0, rotation=0, dt=None):
+        """Apply one step of input and advance the physics. Returns True once the flight is over."""
+        if self.done:
+            return True
+
+        dt = self.dt if dt is None else dt
+        self.lander.apply_controls(throttle_pct, rotation, dt)
+        self.physics.step(dt, self.substeps)
+        # Keep the terrain streamed in around the lander in worlds wider than one chunk
+        x = self.lander.body.position.x
+        if self.terrain.stream(x - self.width / 2, x + self.width / 2):
+            self.physics.set_terrain(self.terrain)
+        self.steps += 1
+        self.time += dt
+
+        if self.physics.landed:
+            self.lander.landed = True
+        return self.done
+
+    def run(self, policy, max_steps=10000):
+        """Fly until touchdown or max_steps using policy(state) -> (throttle_pct, rotation)."""
+        while not self.done and self.steps < max_steps:
+            throttle_pct, rotation = policy(self.get_state())
+            self.step(throttle_pct, rotation)
+        return self.get_state()
+
+    def get_state(self):
+        body = self.lander.body
+        return {
+            "t": self.time,
+            "step": self.steps,
+            "x": body.position.x,
+            "y": body.position.y,
+            "vx": body.velocity.x,
+            "vy": body.velocity.y,
+            "angle": body.angle,
+            "angular_velocity": body.angular_velocity,
+            "altitude": self.lander.get_altitude(self.terrain.index),
+            "fuel": self.lander.fuel_remaining,
+            "mass": body.mass,
+            "throttle_pct": self.lander.throttle_pct,
+            "landed": self.physics.landed,
+            "crashed": self.physics.crashed,
+        }
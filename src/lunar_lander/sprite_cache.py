@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class RotationCache:
+    """Pre-rotated copies of a sprite, with the angle quantized to step_deg buckets.
+
+    Surfaces are created lazily on first use and the least recently used ones are evicted once
+    max_entries is reached. build() renders every bucket up front instead, which makes the cache
+    unbounded.
+    """
+
+    def __init__(self, image, step_deg=0.5, max_entries=256):
+        self.image = image
+        self.step_deg = step_deg
+        self.num_buckets = int(round(360.0 / step_deg))
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def bucket(self, angle_deg):
+        return int(round(angle_deg / self.step_deg)) % self.num_buckets
+
+    def get(self, angle_deg):
+        """Return the sprite rotated counter-clockwise by angle_deg, rounded to the bucket size."""
+        bucket = self.bucket(angle_deg)
+        surface = self._surfaces.get(bucket)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(bucket)
+            return surface
+
+        self.misses += 1
+        surface = pygame.transform.rotate(self.image, bucket * self.step_deg)
+        self._surfaces[bucket] = surface
+        if self.max_entries is not None and len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def build(self):
+        """Render the whole atlas now so no rotation happens during a flight."""
+        self.max_entries = None
+        for bucket in range(self.num_buckets):
+            if bucket not in self._surfaces:
+                self._surfaces[bucket] = pygame.transform.rotate(self.image, bucket * self.step_deg)
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._surfaces),
+        }
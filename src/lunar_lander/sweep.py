@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .events import LandingEvaluated, events
+from .lander import MAX_THRUST, DRY_MASS, FUEL_CAPACITY
+from .utils import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Scripted pilots. Each takes the Simulation state dict plus its own params and returns
+# (throttle_pct, rotation) like the game loop feeds Lander.apply_controls.
+
+
+def freefall_policy(state, params):
+    return 0.0, 0
+
+
+def constant_policy(state, params):
+    return params["throttle"], 0
+
+
+def descent_rate_policy(state, params):
+    """Hold a target descent rate with a proportional throttle around the hover setting."""
+    hover = state["mass"] * params["gravity"] / MAX_THRUST
+    error = params["target_vy"] - state["vy"]
+    return max(0.0, min(1.0, hover + params["gain"] * error)), 0
+
+
+POLICIES = {
+    "freefall": freefall_policy,
+    "constant": constant_policy,
+    "descent_rate": descent_rate_policy,
+}
+
+
+def make_task(task_id, seed, levels, gravity_range, fuel_range, policies):
+    """Build the parameters for one flight. The same seed and id always give the same flight."""
+    rng = random.Random(f"{seed}:{task_id}")
+    gravity = rng.uniform(*gravity_range)
+    policy = rng.choice(policies)
+    params = {"gravity": gravity}
+    if policy == "constant":
+        params["throttle"] = rng.uniform(0.0, 1.0)
+    elif policy == "descent_rate":
+        params["target_vy"] = -rng.uniform(0.5, 4.0)
+        params["gain"] = rng.uniform(0.1, 1.0)
+    return {
+        "id": task_id,
+        "level": rng.choice(levels),
+        "gravity": gravity,
+        "starting_fuel": rng.uniform(*fuel_range),
+        "spawn_x": rng.uniform(SCREEN_WIDTH * 0.05, SCREEN_WIDTH * 0.95),
+        "spawn_y": rng.uniform(SCREEN_HEIGHT * 0.6, SCREEN_HEIGHT * 0.95),
+        "policy": policy,
+        "params": params,
+    }
+
+
+# One Simulation per worker process, reset in place for every flight
+_simulation = None
+# The touchdowns the worker's collision handler evaluated during the current flight
+_touchdowns = []
+
+
+def run_flight(task, max_steps):
+    from .simulation import Simulation
+
+    global _simulation
+    spawn = (task["spawn_x"], task["spawn_y"])
+    if _simulation is None:
+        events.subscribe(LandingEvaluated, _touchdowns.append)
+        _simulation = Simulation(
+            gravity=task["gravity"],
+            difficulty=task["level"],
+            starting_fuel=task["starting_fuel"],
+            spawn=spawn,
+        )
+    else:
+        _simulation.reset(task["gravity"], task["level"], task["starting_fuel"], spawn)
+    sim = _simulation
+    _touchdowns.clear()
+    policy = POLICIES[task["policy"]]
+    params = task["params"]
+    state = sim.run(lambda s: policy(s, params), max_steps)
+
+    impact = sim.physics.impact or {}
+    outcome = "landed" if sim.landed else "crashed" if sim.crashed else "timeout"
+    return {
+        **task,
+        "outcome": outcome,
+        "vh": impact.get("vh"),
+        "vv": impact.get("vv"),
+        "tilt": impact.get("tilt"),
+        "on_pad_segment": impact.get("is_pad"),
+        "reason": _touchdowns[-1].reason if _touchdowns else None,
+        "steps": state["step"],
+        "flight_time": state["t"],
+        "fuel_used": task["starting_fuel"] * FUEL_CAPACITY - state["fuel"],
+        "landing_mass": state["mass"] if impact else DRY_MASS + state["fuel"],
+    }
+
+
+def load_done(path):
+    """Return ids already recorded in a results file, ignoring a truncated last line."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                pass
+    return done
+
+
+def sweep(tasks, out_path, workers=None, max_steps=20000, max_attempts=3):
+    """Fly tasks across a process pool, appending one JSON line per finished flight.
+
+    Flights already in out_path are skipped, so an interrupted sweep resumes where it stopped. If a
+    worker dies the pool is rebuilt and the flights that were in flight are retried, up to
+    max_attempts, after which they are recorded with outcome "error".
+    """
+    workers = workers or os.cpu_count()
+    done = load_done(out_path)
+    pending = [task for task in tasks if task["id"] not in done]
+    attempts = {}
+    print(f"{len(done)} flights already recorded, {len(pending)} to fly on {workers} workers")
+
+    started = time.time()
+    completed = 0
+    with open(out_path, "a") as out:
+        while pending:
+            retry = []
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    in_flight = {}
+                    while pending or in_flight:
+                        # Keep a bounded window queued so huge sweeps don't sit in memory as futures
+                        while pending and len(in_flight) < workers * 4:
+                            # Pop only once submitted, so a broken pool leaves the task pending
+                            future = pool.submit(run_flight, pending[-1], max_steps)
+                            in_flight[future] = pending.pop()
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            try:
+                                result = future.result()
+                            except BrokenProcessPool:
+                                raise
+                            except Exception as e:
+                                result = {**in_flight[future], "outcome": "error", "error": repr(e)}
+                            del in_flight[future]
+                            out.write(json.dumps(result) + "\n")
+                            completed += 1
+                        out.flush()
+            except BrokenProcessPool:
+                retry = list(in_flight.values())
+                print(f"Worker died, restarting pool and retrying {len(retry)} flights")
+
+            for task in retry:
+                attempts[task["id"]] = attempts.get(task["id"], 0) + 1
+                if attempts[task["id"]] >= max_attempts:
+                    out.write(json.dumps({**task, "outcome": "error"}) + "\n")
+                else:
+                    pending.append(task)
+            out.flush()
+
+    elapsed = time.time() - started
+    print(f"Flew {completed} flights in {elapsed:.1f}s -> {out_path}")
+
+
+def summarize(path):
+    totals = {}
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            level = totals.setdefault(result["level"], {})
+            level[result["outcome"]] = level.get(result["outcome"], 0) + 1
+    for level in sorted(totals):
+        counts = ", ".join(f"{k}={v}" for k, v in sorted(totals[level].items()))
+        print(f"level_{level}: {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo landing-envelope sweep")
+    parser.add_argument("--out", default="sweep_results.jsonl", help="JSON lines results file")
+    parser.add_argument("--flights", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Default: all cores")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--gravity", type=float, nargs=2, default=[1.0, 10.0])
+    parser.add_argument("--fuel", type=float, nargs=2, default=[0.05, 1.0])
+    parser.add_argument("--policies", nargs="+", default=sorted(POLICIES), choices=sorted(POLICIES))
+    parser.add_argument("--max-steps", type=int, default=20000)
+    args = parser.parse_args()
+
+    tasks = [
+        make_task(i, args.seed, args.levels, args.gravity, args.fuel, args.policies)
+        for i in range(args.flights)
+    ]
+    sweep(tasks, args.out, args.workers, args.max_steps)
+    summarize(args.out)
+
+
+if __name__ == "__main__":
+    main()
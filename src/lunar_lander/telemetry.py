@@ -0,0 +1,73 @@
+import numpy as np
+
+from .events import Log, events
+
+FIELDS = ("t", "vx", "vy", "altitude", "angle", "angular_velocity", "fuel", "mass", "throttle")
+T, VX, VY, ALTITUDE, ANGLE, ANGULAR_VELOCITY, FUEL, MASS, THROTTLE = range(len(FIELDS))
+
+
+class Telemetry:
+    """Per-step flight samples in a preallocated ring buffer.
+
+    Each sample is one row of a (capacity, len(FIELDS)) float64 array, written in place, so
+    samples need no storage of their own; the only object made per sample is the Vec2d pymunk
+    returns for the body's velocity. Once full, the oldest rows are overwritten.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(FIELDS)))
+        # Samples written since clear(), including any that have been overwritten
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    def sample(self, t, lander, altitude):
+        body = lander.body
+        vx, vy = body.velocity
+        row = self.count % self.capacity
+        data = self.data
+        data[row, T] = t
+        data[row, VX] = vx
+        data[row, VY] = vy
+        data[row, ALTITUDE] = altitude
+        data[row, ANGLE] = body.angle
+        data[row, ANGULAR_VELOCITY] = body.angular_velocity
+        data[row, FUEL] = lander.fuel_remaining
+        data[row, MASS] = body.mass
+        data[row, THROTTLE] = lander.throttle_pct
+        self.count += 1
+
+    def window(self, n=None):
+        """The last n samples (all retained ones if None) in order, oldest first.
+
+        This is a view into the buffer unless the window wraps around its end.
+        """
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self.count % self.capacity or (self.capacity if self.count else 0)
+        start = end - n
+        if start >= 0:
+            return self.data[start:end]
+        return np.concatenate((self.data[start:], self.data[:end]))
+
+    def column(self, name, n=None):
+        return self.window(n)[:, FIELDS.index(name)]
+
+    def export(self, path):
+        """Write the retained samples as .npz (one array per field) or, for any other suffix, CSV."""
+        export_samples(path, self.window())
+
+
+def export_samples(path, samples):
+    """Write samples, a Telemetry window, to path as Telemetry.export does."""
+    path = str(path)
+    if path.endswith(".npz"):
+        np.savez_compressed(path, **{name: samples[:, i] for i, name in enumerate(FIELDS)})
+    else:
+        np.savetxt(path, samples, fmt="%.10g", delimiter=",", header=",".join(FIELDS), comments="")
+    events.publish(Log(f"Telemetry ({len(samples)} samples) written to {path}"))
@@ -1,21 +1,243 @@
+import bisect
+import math
 import random
-import json
 import os
+from collections import OrderedDict
 from pathlib import Path
 
+import numpy as np
 import pymunk
 import pygame
+from .events import Log, TerrainLoaded, events
 from .utils import to_pygame, GRAY, app_config
+from . import terrain_io
+from .terrain_gen import generate_terrain
+
+
+class TerrainCache:
+    """Parsed terrain point arrays shared by every Terrain in the process.
+
+    Entries are keyed on the resolved path and its mtime, so an edited file is re-read, and the
+    least recently used entry is dropped once max_entries is reached. The cached arrays are
+    read-only because every Terrain built from them shares them.
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(path):
+        path = Path(path).resolve()
+        return str(path), path.stat().st_mtime_ns
+
+    def load(self, path):
+        """Return (xs, ys, is_pad) for path, parsing it only if it isn't cached."""
+        key = self.key(path)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        return self.store(path, *terrain_io.read_terrain(path))
+
+    def store(self, path, xs, ys, is_pad):
+        for array in (xs, ys, is_pad):
+            array.setflags(write=False)
+        entry = (xs, ys, is_pad)
+        self._entries[self.key(path)] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+terrain_cache = TerrainCache()
+
+# Chunks within this many chunk widths of the view are loaded, those beyond CHUNK_KEEP evicted. The
+# gap between the two stops a lander hovering over a chunk boundary from reloading it every frame.
+CHUNK_MARGIN = 1
+CHUNK_KEEP = 2
+# Extra pixels around a chunk's ground surface so thick edge lines aren't clipped
+SURFACE_MARGIN = 4
+# Thickness of the ground's collision segments; feet touch down this far above the polyline
+SEGMENT_RADIUS = 2
+
+
+class TerrainIndex:
+    """O(log n) height and landing pad queries over a terrain polyline.
+
+    Segment i runs from point i to point i + 1 and the x breakpoints are sorted, so the segment
+    under any x is found with bisect. Runs of adjacent pad segments are merged into one pad, stored
+    as (left, right) x bounds sorted by left edge.
+    """
+
+    def __init__(self, xs, ys, is_pad):
+        self.xs = [float(x) for x in xs]
+        self.ys = [float(y) for y in ys]
+        self.pads = []
+        pad_flags = [bool(p) for p in is_pad]
+        for i in range(len(self.xs) - 1):
+            if not pad_flags[i]:
+                continue
+            if self.pads and self.pads[-1][1] == self.xs[i]:
+                self.pads[-1] = (self.pads[-1][0], self.xs[i + 1])
+            else:
+                self.pads.append((self.xs[i], self.xs[i + 1]))
+        self._pad_lefts = [left for left, _ in self.pads]
+
+    def segment_at(self, x):
+        """Index of the segment under x, clamped to the first or last segment off either end."""
+        return max(0, min(len(self.xs) - 2, bisect.bisect_right(self.xs, x) - 1))
+
+    def ground_height(self, x):
+        i = self.segment_at(x)
+        x0, x1 = self.xs[i], self.xs[i + 1]
+        y0, y1 = self.ys[i], self.ys[i + 1]
+        if x1 == x0:
+            return max(y0, y1)
+        t = min(1.0, max(0.0, (x - x0) / (x1 - x0)))
+        return y0 + (y1 - y0) * t
+
+    def altitude(self, x, y):
+        """Height of (x, y) above the ground directly beneath it."""
+        return y - self.ground_height(x)
+
+    def pad_at(self, x):
+        """(left, right) bounds of the pad under x, or None."""
+        i = bisect.bisect_right(self._pad_lefts, x) - 1
+        if i >= 0 and x <= self.pads[i][1]:
+            return self.pads[i]
+        return None
+
+    def nearest_pad(self, x, y):
+        """The pad horizontally closest to (x, y), or None if the terrain has no pads.
+
+        Returns a dict with the pad bounds, the offset (dx, dy) from (x, y) to the nearest point on
+        the pad, its distance and its bearing in degrees (0 straight down, positive to the right).
+        """
+        if not self.pads:
+            return None
+        i = bisect.bisect_right(self._pad_lefts, x)
+        best = None
+        for left, right in self.pads[max(0, i - 1) : i + 1]:
+            px = min(right, max(left, x))
+            dx = px - x
+            dy = self.ground_height(px) - y
+            distance = math.hypot(dx, dy)
+            if best is None or (abs(dx), distance) < (abs(best["dx"]), best["distance"]):
+                best = {"left": left, "right": right, "dx": dx, "dy": dy, "distance": distance}
+        best["bearing"] = math.degrees(math.atan2(best["dx"], -best["dy"]))
+        return best
+
+
+class TerrainChunk:
+    """One chunk_width slice of the world: its points and the segments it put in the space."""
+
+    def __init__(self, index, xs, ys, is_pad, lines):
+        self.index = index
+        self.xs = xs
+        self.ys = ys
+        self.is_pad = is_pad
+        self.lines = lines
+        # Ground drawn in chunk-local pixels, created on first draw
+        self.surface = None
+        self.left = int(math.floor(float(xs[0]))) - SURFACE_MARGIN
+        self.right = int(math.ceil(float(xs[-1]))) + SURFACE_MARGIN
+
+
+class PolylineSource:
+    """Chunks sliced out of one whole terrain polyline, such as a (memory-mapped) level file.
+
+    Chunk k holds the segments that start in [k * chunk_width, (k + 1) * chunk_width) plus the
+    point that ends its last segment, which is also the first point of chunk k + 1.
+    """
+
+    def __init__(self, xs, ys, is_pad, chunk_width):
+        self.xs = xs
+        self.ys = ys
+        self.is_pad = is_pad
+        self.chunk_width = chunk_width
+        self.extent = float(xs[-1])
+        self.num_chunks = max(1, int(math.ceil(self.extent / chunk_width)))
+
+    def chunk(self, k):
+        first = np.searchsorted(self.xs, k * self.chunk_width, "left")
+        last = min(np.searchsorted(self.xs, (k + 1) * self.chunk_width, "left"), len(self.xs) - 1)
+        return self.xs[first : last + 1], self.ys[first : last + 1], self.is_pad[first : last + 1]
+
+
+class GeneratedSource:
+    """Seeded terrain generated a chunk at a time, num_chunks wide or endless if None.
+
+    Each chunk comes from (seed, k) alone and the heights where chunks meet from (seed, edge), so
+    an evicted chunk is rebuilt exactly as it was when the camera comes back.
+    """
+
+    def __init__(self, seed, chunk_width, height, difficulty, num_chunks=None):
+        self.seed = seed
+        self.chunk_width = chunk_width
+        self.height = height
+        self.difficulty = difficulty
+        self.num_chunks = num_chunks
+        self.extent = None if num_chunks is None else float(num_chunks * chunk_width)
+
+    def edge_height(self, edge):
+        rng = np.random.default_rng([self.seed, edge, 1])
+        return rng.uniform(self.height * 0.1, self.height * 0.4)
+
+    def chunk(self, k):
+        xs, ys, is_pad = generate_terrain(
+            self.chunk_width,
+            self.height,
+            self.difficulty,
+            [self.seed, k, 0],
+            start_y=self.edge_height(k),
+            end_y=self.edge_height(k + 1),
+        )
+        return xs + k * self.chunk_width, ys, is_pad
 
 
 class Terrain:
-    def __init__(self, space, width, height, difficulty=1):
+    """The ground, streamed into the pymunk space a chunk at a time around the camera.
+
+    The world is cut into chunks one screen (width) wide. stream() keeps the chunks within
+    CHUNK_MARGIN of the view in the space and evicts those more than CHUNK_KEEP away, so the space
+    and memory stay the same size however far the lander flies. A level that fits on the screen is
+    a single chunk that never moves.
+    """
+
+    def __init__(
+        self, space, width, height, difficulty=1, seed=None, world_width=None, terrain_file=None
+    ):
         self.space = space
         self.width = width
         self.height = height
         self.difficulty = max(1, min(5, difficulty))
+        # Seed for levels that have to be generated, None for a different level every time
+        self.seed = seed if seed is not None else app_config.terrain_seed
+        # None plays the level file, otherwise a generated world this wide (0 for endless)
+        self.world_width = world_width
+        # Level file to play instead of the bundled level for this difficulty
+        self.terrain_file = terrain_file if terrain_file is not None else app_config.terrain_file
+        self.source = None
+        self.chunks = OrderedDict()
         self.lines = []
+        self.xs = self.ys = self.is_pad = None
+        self.index = None
+        # (path, mtime) of the file the current segments came from, see reset()
+        self._source_key = None
         self.stars = []
+        # Pre-rendered stars + ground, rebuilt only when the view, terrain or target size changes
+        self._background = None
+        self._background_key = None
+        self._stars_surface = None
         self.generate()
         self.generate_stars()
 
@@ -27,228 +249,239 @@ class Terrain:
             radius = random.randint(1, 2)
             brightness = random.randint(100, 255)
             self.stars.append({"x": x, "y": y, "r": radius, "b": brightness})
+        self._stars_surface = None
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop the cached background so the next draw re-renders it."""
+        self._background = None
+
+    @property
+    def generated_world(self):
+        return self.world_width is not None and not self.terrain_file
+
+    @property
+    def extent(self):
+        """Right edge of the world, or None if it is endless."""
+        return self.source.extent
+
+    def terrain_path(self):
+        if self.terrain_file:
+            return self.terrain_file
+        return Path(__file__).parent / "terrain" / f"level_{self.difficulty}.json"
+
+    def source_key(self):
+        if self.generated_world:
+            return None
+        path = self.terrain_path()
+        return TerrainCache.key(path) if os.path.exists(path) else None
+
+    def reset(self, difficulty=None):
+        """Reuse the segments already in the space unless the level or its file has changed."""
+        if difficulty is not None:
+            difficulty = max(1, min(5, difficulty))
+        same_level = difficulty is None or difficulty == self.difficulty
+        if same_level and self.chunks and self._source_key == self.source_key():
+            # A long flight may have streamed the start of the world out
+            self.stream(0, self.width)
+            return
 
-    def generate(self):
-        if app_config.terrain_file:
-            print("Loading test terrain...")
-            terrain_filepath = app_config.terrain_file
-        else:
-            terrain_filepath = Path(__file__).parent / "terrain" / f"level_{self.difficulty}.json"
+        if difficulty is not None:
+            self.difficulty = difficulty
+        self.generate()
 
-        terrain_data = []  # List of {'x': float, 'y': float, 'isPad': bool}
+    def load_polyline(self):
+        """Return (xs, ys, is_pad) for the level file, generating and saving it if necessary."""
+        terrain_filepath = self.terrain_path()
 
-        # Check if we should load
-        should_load = False
+        # Check if we should load. Both the JSON and binary (.ltb) formats are accepted.
         if os.path.exists(terrain_filepath):
             try:
-                with open(terrain_filepath, "r") as f:
-                    data = json.load(f)
-                    # Check for new format
-                    if isinstance(data, list) and len(data) > 0 and "isPad" in data[0]:
-                        terrain_data = data
-                        should_load = True
-                        print(f"Loaded terrain from {terrain_filepath}.")
-                    elif "points" in data:
-                        # Old format, force regen
-                        print("Old terrain format detected. Regenerating...")
+                xs, ys, is_pad = terrain_cache.load(terrain_filepath)
+                events.publish(TerrainLoaded("file", self.difficulty, path=terrain_filepath))
+                return xs, ys, is_pad
+            except terrain_io.TerrainFormatError:
+                # Old format, force regen
+                events.publish(Log("Old terrain format detected. Regenerating..."))
             except Exception as e:
-                print(f"Failed to load terrain: {e}")
-
-        if not should_load:
-            print(f"Generating new terrain for level {self.difficulty}...")
-
-            # Constraints
-            PAD_WIDTH = 120
-            MIN_GAP_PADS = 200
-            MIN_GAP_EDGE = 200
-            PAD_Y_MIN = 50
-            PAD_Y_MAX = self.height * 0.25
-            MIN_SEGMENTS_BETWEEN = 30
-
-            # Difficulty settings
-            # Level 1: 10% height variation
-            # Level 5: 50% height variation
-            # We apply this to the max change per segment or total range?
-            # User said "use up to 10% of screen height in variation of segment height"
-            # This implies the noise/slope can be larger.
-
-            variation_pct = 0.1 * self.difficulty
-            max_variation = self.height * variation_pct
-            # We'll use this to scale the noise/slope
-
-            # 1. Generate Pad Locations
-            pads = []  # List of (x_start, y)
-
-            attempts = 0
-            while len(pads) < 3 and attempts < 1000:
-                x = random.uniform(MIN_GAP_EDGE, self.width - MIN_GAP_EDGE - PAD_WIDTH)
-
-                valid = True
-                for px, py in pads:
-                    if not (x + PAD_WIDTH < px - MIN_GAP_PADS or x > px + PAD_WIDTH + MIN_GAP_PADS):
-                        valid = False
-                        break
-
-                if valid:
-                    y = random.uniform(PAD_Y_MIN, PAD_Y_MAX)
-                    pads.append((x, y))
-
-                attempts += 1
-
-            if len(pads) < 3:
-                print("Failed to generate valid pads, using fallback")
-                pads = [(200, 100), (self.width / 2 - 60, 150), (self.width - 320, 120)]
-
-            pads.sort(key=lambda p: p[0])
-
-            # 2. Generate Terrain Points
-
-            def generate_rough_segment(p1, p2, num_segments):
-                pts = []
-                dx = (p2[0] - p1[0]) / num_segments
-                current_y = p1[1]
-
-                # Scale noise based on difficulty
-                # User requirement: Level 1 = 10% height variation, Level 5 = 50% height variation.
-                # This variation applies to segment height differences.
-                # max_variation is the total allowed variation, but per segment we should scale it.
-                # Let's say the max random jump per segment is a fraction of this.
-                # If we just use max_variation directly as the range, it might be too chaotic.
-                # But "variation of segment height" implies the delta y.
-
-                # Let's use max_variation as the bounds for the noise.
-                # But since noise is added to slope, we should be careful.
-                # Let's try setting noise_range to a fraction of max_variation, e.g., 1/3.
-                # For Level 1 (90px), range is +/- 30.
-                # For Level 5 (450px), range is +/- 150.
-
-                noise_range = max_variation * 0.3
-
-                for i in range(1, num_segments):
-                    target_x = p1[0] + i * dx
+                events.publish(Log(f"Failed to load terrain: {e}"))
 
-                    remaining_steps = num_segments - i + 1
-                    slope_needed = (p2[1] - current_y) / remaining_steps
+        xs, ys, is_pad = generate_terrain(self.width, self.height, self.difficulty, self.seed)
 
-                    noise = random.uniform(-noise_range, noise_range)
-                    next_y = current_y + slope_needed + noise
+        # Save
+        terrain_io.write_terrain(terrain_filepath, xs, ys, is_pad)
+        events.publish(TerrainLoaded("generated", self.difficulty, path=terrain_filepath))
+        return terrain_cache.store(terrain_filepath, xs, ys, is_pad)
 
-                    # Clamp y to keep it somewhat reasonable, but allow higher peaks with higher difficulty
-                    # Level 1: 60% height max
-                    # Level 5: 90% height max?
-                    max_h = self.height * (0.5 + 0.1 * self.difficulty)
-                    next_y = max(20, min(next_y, max_h))
-
-                    pts.append({"x": target_x, "y": next_y, "isPad": False})
-                    current_y = next_y
-
-                return pts
-
-            start_y = random.uniform(self.height * 0.1, self.height * 0.4)
-            current_point = (0, start_y)
-            terrain_data.append({"x": 0, "y": start_y, "isPad": False})
-
-            for i in range(3):
-                pad_x, pad_y = pads[i]
-                pad_start = (pad_x, pad_y)
-                pad_end = (pad_x + PAD_WIDTH, pad_y)
-
-                # Gap
-                dist = pad_start[0] - current_point[0]
-                n_segments = max(MIN_SEGMENTS_BETWEEN, int(dist / 10))
-
-                gap_pts = generate_rough_segment(current_point, pad_start, n_segments)
-                terrain_data.extend(gap_pts)
-
-                # Add Pad Start
-                # The segment STARTING at pad_start is a pad.
-                terrain_data.append({"x": pad_start[0], "y": pad_start[1], "isPad": True})
-
-                # Add Pad End
-                # The segment STARTING at pad_end is NOT a pad (it's the start of the next gap)
-                terrain_data.append({"x": pad_end[0], "y": pad_end[1], "isPad": False})
-
-                current_point = pad_end
-
-            # Final gap
-            end_target = (self.width, random.uniform(self.height * 0.1, self.height * 0.4))
-            dist = end_target[0] - current_point[0]
-            n_segments = max(MIN_SEGMENTS_BETWEEN, int(dist / 10))
-
-            gap_pts = generate_rough_segment(current_point, end_target, n_segments)
-            terrain_data.extend(gap_pts)
-
-            # Add final point
-            terrain_data.append({"x": end_target[0], "y": end_target[1], "isPad": False})
-
-            # Save
-            with open(terrain_filepath, "w") as f:
-                json.dump(terrain_data, f, indent=2)
-                print(f"Terrain saved to: {terrain_filepath}")
+    def generate(self):
+        for chunk in self.chunks.values():
+            self.space.remove(*chunk.lines)
+        self.chunks = OrderedDict()
+
+        if self.generated_world:
+            # Fix the seed now so evicted chunks regenerate identically
+            seed = self.seed if self.seed is not None else random.randrange(2**32)
+            num_chunks = None
+            if self.world_width > 0:
+                num_chunks = max(1, int(math.ceil(self.world_width / self.width)))
+            events.publish(TerrainLoaded("streamed", self.difficulty, seed=seed))
+            self.source = GeneratedSource(
+                seed, self.width, self.height, self.difficulty, num_chunks
+            )
+        else:
+            self.source = PolylineSource(*self.load_polyline(), self.width)
+        self._source_key = self.source_key()
+        self.stream(0, self.width)
+
+    def chunk_range(self, x0, x1, margin):
+        first = max(0, int(x0 // self.width) - margin)
+        last = int(x1 // self.width) + margin
+        if self.source.num_chunks is not None:
+            last = min(last, self.source.num_chunks - 1)
+        return first, last
+
+    def stream(self, x0, x1):
+        """Load the chunks around the view [x0, x1] and evict far ones. True if anything changed."""
+        # Past either end of the world, keep the chunks at that end rather than none at all
+        hi = self.source.extent if self.source.extent is not None else math.inf
+        x0 = min(max(x0, 0.0), hi)
+        x1 = min(max(x1, 0.0), hi)
+        first, last = self.chunk_range(x0, x1, CHUNK_MARGIN)
+        keep_first, keep_last = self.chunk_range(x0, x1, CHUNK_KEEP)
+        changed = False
+        for k in list(self.chunks):
+            if not keep_first <= k <= keep_last:
+                self.space.remove(*self.chunks.pop(k).lines)
+                changed = True
+        for k in range(first, last + 1):
+            if k not in self.chunks:
+                self.chunks[k] = self.load_chunk(k)
+                changed = True
+        if changed:
+            self.chunks = OrderedDict(sorted(self.chunks.items()))
+            self.rebuild()
+        return changed
+
+    def load_chunk(self, k):
+        xs, ys, is_pad = self.source.chunk(k)
 
         # Create Pymunk segments
-        self.lines = []
-        for i in range(len(terrain_data) - 1):
-            p1_data = terrain_data[i]
-            p2_data = terrain_data[i + 1]
-
-            p1 = (p1_data["x"], p1_data["y"])
-            p2 = (p2_data["x"], p2_data["y"])
-
-            segment = pymunk.Segment(self.space.static_body, p1, p2, 2)
+        lines = []
+        points = list(zip(xs.tolist(), ys.tolist()))
+        pads = is_pad.tolist()
+        for i in range(len(points) - 1):
+            segment = pymunk.Segment(
+                self.space.static_body, points[i], points[i + 1], SEGMENT_RADIUS
+            )
             segment.elasticity = 0.5
             segment.friction = 1.0
             segment.collision_type = 2
 
             # Use the stored bool
-            segment.is_pad = p1_data["isPad"]
-
-            self.space.add(segment)
-            self.lines.append(segment)
-
-    def draw(self, screen, height):
-        # Draw stars first
-        for star in self.stars:
-            color = (star["b"], star["b"], star["b"])
-            pygame.draw.circle(screen, color, (star["x"], star["y"]), star["r"])
+            segment.is_pad = pads[i]
+
+            lines.append(segment)
+        self.space.add(*lines)
+        return TerrainChunk(k, xs, ys, is_pad, lines)
+
+    def rebuild(self):
+        """Refresh the polyline, index and segment list after the loaded chunks change."""
+        # Neighbouring chunks share their boundary point, so all but the first drop it
+        chunks = list(self.chunks.values())
+        parts = [
+            (c.xs, c.ys, c.is_pad) if i == 0 else (c.xs[1:], c.ys[1:], c.is_pad[1:])
+            for i, c in enumerate(chunks)
+        ]
+        self.xs = np.concatenate([p[0] for p in parts])
+        self.ys = np.concatenate([p[1] for p in parts])
+        self.is_pad = np.concatenate([p[2] for p in parts])
+        self.index = TerrainIndex(self.xs, self.ys, self.is_pad)
+        self.lines = [line for chunk in chunks for line in chunk.lines]
+        self.invalidate()
+
+    def polyline(self):
+        """Return the loaded terrain as parallel x, y and is_pad arrays (pad flag per segment start)."""
+        return self.xs, self.ys, self.is_pad
+
+    def background(self, screen, height, camera=None):
+        """Return the cached stars + ground surface for this screen and view, rendering it if needed."""
+        offset = camera.offset if camera is not None else 0
+        key = (screen.get_size(), height, offset)
+        if self._background is None or self._background_key != key:
+            if self._background is None or self._background.get_size() != screen.get_size():
+                self._background = pygame.Surface(screen.get_size(), 0, screen)
+            self._background.fill((0, 0, 0))
+            self.render_background(self._background, height, offset)
+            self._background_key = key
+        return self._background
+
+    def draw(self, screen, height, camera=None):
+        return screen.blit(self.background(screen, height, camera), (0, 0))
+
+    def render_background(self, screen, height, offset=0):
+        # Draw stars first. They are far enough away not to scroll.
+        if self._stars_surface is None or self._stars_surface.get_size() != screen.get_size():
+            self._stars_surface = pygame.Surface(screen.get_size(), 0, screen)
+            self._stars_surface.fill((0, 0, 0))
+            for star in self.stars:
+                color = (star["b"], star["b"], star["b"])
+                pygame.draw.circle(self._stars_surface, color, (star["x"], star["y"]), star["r"])
+        screen.blit(self._stars_surface, (0, 0))
+
+        # Then the ground of every chunk in view, each rendered once and shifted by the camera
+        view_right = offset + screen.get_width()
+        for chunk in self.chunks.values():
+            if chunk.left >= view_right or chunk.right <= offset:
+                continue
+            if chunk.surface is None or chunk.surface.get_height() != height:
+                chunk.surface = self.render_chunk(chunk, screen, height)
+            screen.blit(chunk.surface, (chunk.left - offset, 0))
+
+    def render_chunk(self, chunk, screen, height):
+        """Draw a chunk's ground onto a transparent surface in chunk-local pixels."""
+        left = chunk.left
+        surface = pygame.Surface((chunk.right - left, height), 0, screen)
+        surface.fill((0, 0, 0))
+        surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+
+        def to_local(p):
+            x, y = to_pygame(p, height)
+            return x - left, y
 
         # Create a polygon for the ground
-        # Points: (0, 0), all terrain points, (width, 0)
+        # Points: bottom-left, all terrain points, bottom-right
         # Note: Pygame coordinates have (0,0) at top-left.
         # Our terrain points are in Pymunk coordinates (y up).
         # We need to convert them.
 
+        if not chunk.lines:
+            return surface
+
         poly_points = []
         # Start at bottom-left
-        poly_points.append((0, height))
+        poly_points.append((to_local(chunk.lines[0].a)[0], height))
 
         # Add all terrain points
-        # We can iterate through lines to get points in order
         # lines[0].a is the first point
         # lines[i].b is the next point
-
-        if not self.lines:
-            return
-
-        first_pt = self.lines[0].a
-        poly_points.append(to_pygame(first_pt, height))
-
-        for line in self.lines:
-            poly_points.append(to_pygame(line.b, height))
+        poly_points.append(to_local(chunk.lines[0].a))
+        for line in chunk.lines:
+            poly_points.append(to_local(line.b))
 
         # End at bottom-right
-        poly_points.append((self.width, height))
+        poly_points.append((to_local(chunk.lines[-1].b)[0], height))
 
         # Draw filled polygon
-        pygame.draw.polygon(screen, (50, 50, 50), poly_points)
+        pygame.draw.polygon(surface, (50, 50, 50), poly_points)
 
         # Draw surface lines
-        for line in self.lines:
-            p1 = to_pygame(line.a, height)
-            p2 = to_pygame(line.b, height)
+        for line in chunk.lines:
+            p1 = to_local(line.a)
+            p2 = to_local(line.b)
 
             if getattr(line, "is_pad", False):
                 # Draw thick pad
-                pygame.draw.line(screen, (70, 150, 80), p1, p2, 5)
+                pygame.draw.line(surface, (70, 150, 80), p1, p2, 5)
             else:
-                pygame.draw.line(screen, GRAY, p1, p2, 3)
+                pygame.draw.line(surface, GRAY, p1, p2, 3)
+        return surface
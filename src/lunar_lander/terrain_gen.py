@@ -0,0 +1,192 @@
+"""Seeded terrain generation and a parallel builder for level corpora.
+
+The same width, height, difficulty and seed always give the same terrain. Points are produced with
+NumPy a whole gap at a time, so worlds with 100k+ segments generate in milliseconds.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import terrain_io
+from .utils import SCREEN_WIDTH, SCREEN_HEIGHT
+
+PAD_WIDTH = 120
+MIN_GAP_PADS = 200
+MIN_GAP_EDGE = 200
+PAD_Y_MIN = 50
+MIN_SEGMENTS_BETWEEN = 30
+SEGMENT_WIDTH = 10  # px of ground per segment between pads
+MIN_GROUND = 20
+
+
+def place_pads(rng, width, height, num_pads=3):
+    """Return sorted pad start x and pad y arrays.
+
+    Pads keep MIN_GAP_EDGE from the edges and MIN_GAP_PADS from each other. Rather than rejection
+    sampling, the free space left over once the gaps are reserved is split at sorted uniform
+    offsets, which is uniform over every valid layout.
+    """
+    slack = width - 2 * MIN_GAP_EDGE - num_pads * PAD_WIDTH - (num_pads - 1) * MIN_GAP_PADS
+    if slack < 0:
+        raise ValueError(f"A {width}px wide world has no room for {num_pads} pads")
+    offsets = np.sort(rng.uniform(0, slack, num_pads))
+    xs = MIN_GAP_EDGE + np.arange(num_pads) * (PAD_WIDTH + MIN_GAP_PADS) + offsets
+    ys = rng.uniform(PAD_Y_MIN, height * 0.25, num_pads)
+    return xs, ys
+
+
+def rough_segment(rng, p1, p2, noise_range, max_h):
+    """Interior points of rough ground from p1 to p2.
+
+    A random walk of uniform steps in +/- noise_range is pinned to both endpoints (a discrete
+    Brownian bridge) and laid over the straight line between them.
+    """
+    num_segments = max(MIN_SEGMENTS_BETWEEN, int((p2[0] - p1[0]) / SEGMENT_WIDTH))
+    t = np.arange(1, num_segments) / num_segments
+    walk = np.cumsum(rng.uniform(-noise_range, noise_range, num_segments))
+    xs = p1[0] + (p2[0] - p1[0]) * t
+    ys = p1[1] + (p2[1] - p1[1]) * t + walk[:-1] - t * walk[-1]
+    return xs, np.clip(ys, MIN_GROUND, max_h)
+
+
+def generate_terrain(width, height, difficulty=1, seed=None, num_pads=3, start_y=None, end_y=None):
+    """Return (xs, ys, is_pad) arrays for a new level. seed=None draws fresh OS entropy.
+
+    start_y and end_y pin the heights of the two ends, so adjacent pieces of a wider world join up.
+    """
+    rng = np.random.default_rng(seed)
+    difficulty = max(1, min(5, difficulty))
+
+    # Level 1 varies the ground by up to 10% of the screen height, level 5 by up to 50%
+    max_variation = height * 0.1 * difficulty
+    noise_range = max_variation * 0.3
+    # Peaks may rise higher on harder levels: 60% of the height at level 1, 100% at level 5
+    max_h = height * (0.5 + 0.1 * difficulty)
+
+    pad_xs, pad_ys = place_pads(rng, width, height, num_pads)
+    if start_y is None:
+        start_y = rng.uniform(height * 0.1, height * 0.4)
+    if end_y is None:
+        end_y = rng.uniform(height * 0.1, height * 0.4)
+    start = (0.0, start_y)
+    end = (float(width), end_y)
+
+    xs = [np.array([start[0]])]
+    ys = [np.array([start[1]])]
+    pads = [np.zeros(1, dtype=bool)]
+
+    def add(part_xs, part_ys, is_pad=False):
+        xs.append(np.asarray(part_xs, dtype=np.float64))
+        ys.append(np.asarray(part_ys, dtype=np.float64))
+        pads.append(np.full(len(xs[-1]), is_pad))
+
+    current = start
+    for pad_x, pad_y in zip(pad_xs.tolist(), pad_ys.tolist()):
+        add(*rough_segment(rng, current, (pad_x, pad_y), noise_range, max_h))
+        # The segment starting at the pad start is the pad; the one starting at its end is not
+        add([pad_x], [pad_y], True)
+        add([pad_x + PAD_WIDTH], [pad_y])
+        current = (pad_x + PAD_WIDTH, pad_y)
+
+    add(*rough_segment(rng, current, end, noise_range, max_h))
+    add([end[0]], [end[1]])
+
+    return np.concatenate(xs), np.concatenate(ys), np.concatenate(pads)
+
+
+def build_level(job):
+    """Generate and save one corpus level. Runs in worker processes."""
+    xs, ys, is_pad = generate_terrain(
+        job["width"], job["height"], job["difficulty"], job["seed"], job["pads"]
+    )
+    terrain_io.write_terrain(job["path"], xs, ys, is_pad)
+    return {
+        "file": os.path.basename(job["path"]),
+        "difficulty": job["difficulty"],
+        "seed": job["seed"],
+        "width": job["width"],
+        "height": job["height"],
+        "segments": len(xs) - 1,
+    }
+
+
+def build_corpus(
+    out_dir,
+    count,
+    seed=0,
+    levels=(1, 2, 3, 4, 5),
+    width=SCREEN_WIDTH,
+    height=SCREEN_HEIGHT,
+    pads=3,
+    workers=None,
+    suffix=terrain_io.BINARY_SUFFIX,
+):
+    """Write count levels to out_dir across a process pool, plus a manifest.jsonl describing them.
+
+    Level i uses seed + i and cycles through levels, so any file can be regenerated on its own.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = []
+    for i in range(count):
+        difficulty = levels[i % len(levels)]
+        level_seed = seed + i
+        path = os.path.join(out_dir, f"level_{difficulty}_{level_seed}{suffix}")
+        jobs.append(
+            {
+                "path": path,
+                "difficulty": difficulty,
+                "seed": level_seed,
+                "width": width,
+                "height": height,
+                "pads": pads,
+            }
+        )
+
+    workers = workers or os.cpu_count()
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        manifest = list(pool.map(build_level, jobs, chunksize=max(1, count // (workers * 8))))
+    with open(os.path.join(out_dir, "manifest.jsonl"), "w") as f:
+        for entry in manifest:
+            f.write(json.dumps(entry) + "\n")
+
+    elapsed = time.time() - started
+    print(f"Built {count} levels in {elapsed:.1f}s on {workers} workers -> {out_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a corpus of seeded terrain levels")
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="Level i uses seed + i")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--width", type=int, default=SCREEN_WIDTH)
+    parser.add_argument("--height", type=int, default=SCREEN_HEIGHT)
+    parser.add_argument("--pads", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="Default: all cores")
+    parser.add_argument(
+        "--json", action="store_true", help=f"Write JSON instead of {terrain_io.BINARY_SUFFIX}"
+    )
+    args = parser.parse_args()
+
+    build_corpus(
+        args.out_dir,
+        args.count,
+        args.seed,
+        args.levels,
+        args.width,
+        args.height,
+        args.pads,
+        args.workers,
+        ".json" if args.json else terrain_io.BINARY_SUFFIX,
+    )
+
+
+if __name__ == "__main__":
+    main()
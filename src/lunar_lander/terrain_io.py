@@ -0,0 +1,118 @@
+"""Terrain file formats.
+
+Levels are stored either as the editor's JSON list of {"x", "y", "isPad"} points or in a compact
+binary format that can be memory-mapped:
+
+    header   magic b"LLTB", uint16 version, uint16 flags (reserved), uint32 point count
+    x        float32[count]
+    y        float32[count]
+    is_pad   bitmask, ceil(count / 8) bytes, little bit order
+
+All fields are little-endian. is_pad marks the segment that starts at each point.
+"""
+
+import argparse
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"LLTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+BINARY_SUFFIX = ".ltb"
+
+
+class TerrainFormatError(ValueError):
+    pass
+
+
+def is_binary(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_binary(path):
+    """Map a binary terrain file without copying it. Returns read-only (xs, ys, is_pad) arrays."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(data) < HEADER.size:
+        raise TerrainFormatError(f"{path}: truncated header")
+    magic, version, _flags, count = HEADER.unpack(data[: HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise TerrainFormatError(f"{path}: not a binary terrain file")
+    if version != VERSION:
+        raise TerrainFormatError(f"{path}: unsupported terrain version {version}")
+
+    xs_offset = HEADER.size
+    ys_offset = xs_offset + 4 * count
+    pad_offset = ys_offset + 4 * count
+    if len(data) < pad_offset + (count + 7) // 8:
+        raise TerrainFormatError(f"{path}: truncated, expected {count} points")
+
+    xs = np.frombuffer(data, dtype="<f4", count=count, offset=xs_offset)
+    ys = np.frombuffer(data, dtype="<f4", count=count, offset=ys_offset)
+    pad_bits = np.frombuffer(data, dtype=np.uint8, count=(count + 7) // 8, offset=pad_offset)
+    is_pad = np.unpackbits(pad_bits, count=count, bitorder="little").astype(bool)
+    return xs, ys, is_pad
+
+
+def write_binary(path, xs, ys, is_pad):
+    xs = np.asarray(xs, dtype="<f4")
+    ys = np.asarray(ys, dtype="<f4")
+    is_pad = np.asarray(is_pad, dtype=bool)
+    if not len(xs) == len(ys) == len(is_pad):
+        raise ValueError("xs, ys and is_pad must be the same length")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(xs)))
+        f.write(xs.tobytes())
+        f.write(ys.tobytes())
+        f.write(np.packbits(is_pad, bitorder="little").tobytes())
+
+
+def read_json(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not (isinstance(data, list) and len(data) > 0 and "isPad" in data[0]):
+        raise TerrainFormatError(f"{path}: old or unknown terrain format")
+    xs = np.array([p["x"] for p in data], dtype=np.float64)
+    ys = np.array([p["y"] for p in data], dtype=np.float64)
+    is_pad = np.array([p["isPad"] for p in data], dtype=bool)
+    return xs, ys, is_pad
+
+
+def write_json(path, xs, ys, is_pad, indent=2):
+    data = [{"x": float(x), "y": float(y), "isPad": bool(pad)} for x, y, pad in zip(xs, ys, is_pad)]
+    with open(path, "w") as f:
+        json.dump(data, f, indent=indent)
+
+
+def read_terrain(path):
+    """Load (xs, ys, is_pad) from either format, detected from the file contents."""
+    if is_binary(path):
+        return read_binary(path)
+    return read_json(path)
+
+
+def write_terrain(path, xs, ys, is_pad):
+    """Save in the binary format for .ltb paths and as JSON otherwise."""
+    if str(path).endswith(BINARY_SUFFIX):
+        write_binary(path, xs, ys, is_pad)
+    else:
+        write_json(path, xs, ys, is_pad)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=f"Convert terrain between JSON and the binary {BINARY_SUFFIX} format"
+    )
+    parser.add_argument("input")
+    parser.add_argument("output", help=f"Written as binary if it ends in {BINARY_SUFFIX}")
+    args = parser.parse_args()
+
+    xs, ys, is_pad = read_terrain(args.input)
+    write_terrain(args.output, xs, ys, is_pad)
+    print(f"Converted {len(xs)} points: {args.input} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import math
+
+import numpy as np
+
+from .lander import EARTH_G0
+from .physics import landing_violation
+from .terrain import SEGMENT_RADIUS
+
+# How far ahead the prediction looks, and in what steps: the game's physics step
+HORIZON = 120.0
+STEP_DT = 1.0 / 30
+
+
+class TrajectoryPredictor:
+    """Predicts where and how the lander touches down if the pilot holds throttle and attitude.
+
+    Nothing is stepped: with the attitude held the thrust has a fixed direction u, and every
+    physics step Lander.thrust adds an impulse F dt / m along it while burning mdot = F / ve
+    (ve = Isp * g0) of fuel, so m before step k is m0 - (k - 1) mdot dt until the tanks are dry.
+    The velocity gained from thrust by each step is therefore a cumulative sum over known masses
+    (the discrete rocket equation), and pymunk moves each body by its post-impulse, pre-gravity
+    velocity, which sums in closed form too. Every step of the horizon is computed in a few
+    NumPy passes and both feet are tested against the terrain polyline at once. The first step
+    that puts a foot on the ground is the one pymunk will report the touchdown in.
+    """
+
+    def __init__(self, horizon=HORIZON, dt=STEP_DT):
+        self.dt = dt
+        self.steps = np.arange(1, int(horizon / dt) + 1, dtype=float)
+        # Gravity's share of the displacement after n steps, per unit g: dt^2 n (n - 1) / 2
+        self._fall = dt * dt * self.steps * (self.steps - 1) / 2
+        self._ground = None
+
+    def _ground_arrays(self, xs, ys):
+        """Per-segment slope and the vertical clearance at which a foot touches that segment."""
+        if self._ground is None or self._ground[0] is not xs or self._ground[1] is not ys:
+            xs = np.asarray(xs, dtype=float)
+            ys = np.asarray(ys, dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slope = np.nan_to_num(np.diff(ys) / np.diff(xs))
+            # Segments are SEGMENT_RADIUS thick at right angles to them, so taller on slopes
+            touch = SEGMENT_RADIUS * np.sqrt(1 + slope * slope)
+            self._ground = (xs, ys, slope, touch)
+        return self._ground
+
+    def _thrust_velocity(self, lander, throttle_pct):
+        """Velocity gained along the thrust axis by the end of each step, or None if not burning."""
+        thrust = lander.max_thrust * throttle_pct
+        if thrust <= 0 or lander.fuel_remaining <= 0:
+            return None
+        mdot = thrust / (lander.specific_impulse * EARTH_G0)
+        burned = np.minimum((self.steps - 1) * (mdot * self.dt), lander.fuel_remaining)
+        impulse = (thrust * self.dt) / (lander.body.mass - burned)
+        # Lander.thrust does nothing once the fuel is gone
+        impulse[burned >= lander.fuel_remaining] = 0.0
+        return np.cumsum(impulse)
+
+    def predict(self, lander, throttle_pct, gravity, xs, ys, terrain_index=None):
+        """Contact prediction as a dict, or None if the lander stays airborne past the horizon.
+
+        The dict has the time to contact t, the point x, y where a foot touches, the velocities vh
+        and vv and tilt at contact, safe (inside the landing envelope), on_pad (both feet over one
+        pad) and path, the predicted positions of the body up to contact.
+        """
+        if xs is None or len(xs) < 2:
+            return None
+        body = lander.body
+        dt = self.dt
+        n = self.steps
+        angle = body.angle
+        # Lander.thrust pushes along the body's local +y
+        ux, uy = -math.sin(angle), math.cos(angle)
+        vx0, vy0 = body.velocity
+        x0, y0 = body.position
+
+        x = x0 + vx0 * dt * n
+        y = y0 + vy0 * dt * n - gravity * self._fall
+        dv = self._thrust_velocity(lander, throttle_pct)
+        if dv is not None:
+            ds = np.cumsum(dv) * dt
+            x += ux * ds
+            y += uy * ds
+
+        # Feet stay at fixed offsets from the body while the attitude is held. Each foot's
+        # clearance is its height above the ground less the segment's thickness there.
+        gx, gy, slope, touch = self._ground_arrays(xs, ys)
+        feet = [pad.a.rotated(angle) for pad in lander.landing_pads]
+        clearances = []
+        for foot in feet:
+            fx = x + foot.x
+            seg = np.clip(np.searchsorted(gx, fx, side="right") - 1, 0, len(gx) - 2)
+            ground = gy[seg] + slope[seg] * (fx - gx[seg])
+            clearances.append(y + foot.y - ground - touch[seg])
+        clearance = np.minimum(*clearances)
+
+        below = np.flatnonzero(clearance <= 0)
+        if not len(below):
+            return None
+        i = below[0]
+        if i == 0:
+            # Already on the ground
+            return None
+        # Where the foot meets the ground, between the last step above it and the first on it
+        c0, c1 = clearance[i - 1], clearance[i]
+        f = c0 / (c0 - c1)
+        cx = x[i - 1] + (x[i] - x[i - 1]) * f
+        cy = y[i - 1] + (y[i] - y[i - 1]) * f
+        # The foot that comes down first
+        foot = min(zip(clearances, feet), key=lambda item: item[0][i])[1]
+
+        # The collision handler sees the velocity after that step's thrust but before its gravity
+        gained = 0.0 if dv is None else dv[i]
+        tc = (i + 1) * dt
+        vh = abs(vx0 + ux * gained)
+        vv = abs(vy0 + uy * gained - gravity * dt * i)
+        tilt = math.degrees(angle)
+        on_pad = False
+        if terrain_index is not None:
+            left, right = (cx + offset.x for offset in feet)
+            pad = terrain_index.pad_at((left + right) / 2)
+            on_pad = pad is not None and left >= pad[0] and right <= pad[1]
+        return {
+            "t": tc,
+            "x": cx + foot.x,
+            "y": cy + foot.y,
+            "vh": vh,
+            "vv": vv,
+            "tilt": tilt,
+            "safe": landing_violation(vv, vh, tilt) is None,
+            "on_pad": on_pad,
+            "path": (x[:i], y[:i]),
+        }
@@ -1,96 +1,208 @@
+from collections import OrderedDict
+
+import numpy as np
 import pygame
-from .utils import BLACK, WHITE, RED, GREEN, YELLOW, ORANGE, app_config, GRAVITY_MOON
+from .assets import assets
+from .physics import MAX_VV
+from .telemetry import ALTITUDE, VY
+from .utils import BLACK, WHITE, RED, GREEN, YELLOW, ORANGE, app_config
+
+
+class TextCache:
+    """Rendered text surfaces keyed on (font, text, color), with LRU eviction."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+
+text_cache = TextCache()
+
+# Telemetry samples shown by the HUD's descent rate vs altitude plot, 5 s at the physics rate
+SPARKLINE_SAMPLES = 150
 
 
 class HUD:
     def __init__(self):
-        self.font = pygame.font.SysFont("Arial", 16)
+        self.font = assets.font("hud")
+        # name -> (displayed value, surface, position). A widget is only re-rendered when the
+        # value it shows changes; every frame just blits the cached surfaces.
+        self._widgets = {}
+
+    def _widget(self, name, value, pos, render):
+        widget = self._widgets.get(name)
+        if widget is None or widget[0] != value or widget[2] != pos:
+            widget = (value, render(), pos)
+            self._widgets[name] = widget
+        return widget
+
+    def _text(self, name, text, color, pos):
+        return self._widget(
+            name, (text, color), pos, lambda: text_cache.render(self.font, text, color)
+        )
 
-    def _draw_fuel_gauge(self, screen, fuel, max_fuel):
+    def _fuel_gauge(self, screen, fuel, max_fuel):
         gauge_width = 100
         gauge_height = 20
         x = screen.get_width() - gauge_width - 10
         y = 10
 
         border_thickness = 2
-
-        # Draw border
-        gauge = pygame.draw.rect(screen, WHITE, (x, y, gauge_width, gauge_height), border_thickness)
-
-        # Draw background
-        display_area = pygame.draw.rect(
-            screen,
-            BLACK,
-            (
-                gauge.x + border_thickness,
-                gauge.y + border_thickness,
-                gauge.width - 2 * border_thickness,
-                gauge.height - 2 * border_thickness,
-            ),
-        )
+        inner_width = gauge_width - 2 * border_thickness
+        inner_height = gauge_height - 2 * border_thickness
 
         pct_fuel_remaining = max(0.0, min(1.0, fuel / max_fuel)) if max_fuel > 0 else 0
-        fill_width = int(pct_fuel_remaining * display_area.width)
+        fill_width = int(pct_fuel_remaining * inner_width)
         fill_color = GREEN
         if pct_fuel_remaining < 0.2:
             fill_color = RED
         elif pct_fuel_remaining < 0.3:
             fill_color = ORANGE
 
-        pygame.draw.rect(
-            screen, fill_color, (display_area.x, display_area.y, fill_width, display_area.height)
-        )
+        def render():
+            surface = pygame.Surface((gauge_width, gauge_height))
+            surface.fill(BLACK)
+            pygame.draw.rect(surface, WHITE, (0, 0, gauge_width, gauge_height), border_thickness)
+            pygame.draw.rect(
+                surface, fill_color, (border_thickness, border_thickness, fill_width, inner_height)
+            )
+            return surface
 
-        fuel_text = self.font.render(f"Fuel: {int(fuel)}", True, WHITE)
-        screen.blit(fuel_text, (x - 80, y))
+        return [
+            self._widget("fuel_gauge", (fill_width, fill_color), (x, y), render),
+            self._text("fuel_text", f"Fuel: {int(fuel)}", WHITE, (x - 80, y)),
+        ]
 
-    def _draw_throttle_gauge(self, screen, throttle_pct):
+    def _throttle_gauge(self, throttle_pct):
         gauge_width = 20
         gauge_height = 100
         x = 10
         y = 100
 
-        # Draw border and background
         border_thickness = 2
-        gauge = pygame.draw.rect(screen, WHITE, (x, y, gauge_width, gauge_height), border_thickness)
-        display_area = pygame.draw.rect(
-            screen,
-            BLACK,
-            (
-                gauge.x + border_thickness,
-                gauge.y + border_thickness,
-                gauge.width - 2 * border_thickness,
-                gauge.height - 2 * border_thickness,
-            ),
-        )
+        inner_width = gauge_width - 2 * border_thickness
+        inner_height = gauge_height - 2 * border_thickness
 
         # Draw segments
         segment_height = 5
         segment_margin = 1
 
         # Calculate available height for segments
-        num_segments = display_area.height // (segment_height + segment_margin)
+        num_segments = inner_height // (segment_height + segment_margin)
         active_segments = int(throttle_pct * num_segments)
 
-        start_x = display_area.x
-        start_y = display_area.bottom - segment_height
-
-        for i in range(num_segments):
-            color = (200, 200, 200) if i < active_segments else (50, 50, 50)
-            seg_y = start_y - i * (segment_height + segment_margin)
-            pygame.draw.rect(
-                screen,
-                color,
-                (
-                    start_x,
-                    seg_y,
-                    display_area.width,
-                    segment_height,
-                ),
-            )
-
-        throttle_text = self.font.render(f"Throttle: {int(throttle_pct * 100)}", True, WHITE)
-        screen.blit(throttle_text, (x, y + gauge_height + 5))
+        def render():
+            surface = pygame.Surface((gauge_width, gauge_height))
+            surface.fill(BLACK)
+            pygame.draw.rect(surface, WHITE, (0, 0, gauge_width, gauge_height), border_thickness)
+
+            start_y = border_thickness + inner_height - segment_height
+            for i in range(num_segments):
+                color = (200, 200, 200) if i < active_segments else (50, 50, 50)
+                seg_y = start_y - i * (segment_height + segment_margin)
+                pygame.draw.rect(
+                    surface, color, (border_thickness, seg_y, inner_width, segment_height)
+                )
+            return surface
+
+        return [
+            self._widget("throttle_gauge", active_segments, (x, y), render),
+            self._text(
+                "throttle_text",
+                f"Throttle: {int(throttle_pct * 100)}",
+                WHITE,
+                (x, y + gauge_height + 5),
+            ),
+        ]
+
+    def _sparkline(self, screen, telemetry):
+        plot_width = 180
+        plot_height = 60
+        x = screen.get_width() - plot_width - 10
+        y = 60
+        window = telemetry.window(SPARKLINE_SAMPLES)
+        points = None
+        limit_y = None
+        if len(window) >= 2:
+            # Altitude across the window runs right to left as the lander comes down, descent
+            # rate is up the side
+            altitude = window[:, ALTITUDE]
+            descent_rate = -window[:, VY]
+            low = altitude.min()
+            span = max(altitude.max() - low, 1.0)
+            max_rate = max(descent_rate.max(), MAX_VV * 1.5)
+            px = 2 + (altitude - low) / span * (plot_width - 4)
+            py = plot_height - 2 - np.clip(descent_rate / max_rate, 0, 1) * (plot_height - 4)
+            # Whole pixels, so the plot is only redrawn when it would look different
+            points = np.rint(np.stack((px, py), axis=1)).astype(int)
+            # Touchdown limit for the descent rate
+            limit_y = round(plot_height - 2 - MAX_VV / max_rate * (plot_height - 4))
+
+        def render():
+            surface = pygame.Surface((plot_width, plot_height))
+            surface.fill(BLACK)
+            pygame.draw.rect(surface, WHITE, (0, 0, plot_width, plot_height), 1)
+            if points is None:
+                return surface
+            pygame.draw.line(surface, (120, 0, 0), (2, limit_y), (plot_width - 2, limit_y))
+            pygame.draw.lines(surface, GREEN, False, points.tolist())
+            return surface
+
+        key = None if points is None else (points.tobytes(), limit_y)
+        return [
+            self._widget("sparkline", key, (x, y), render),
+            self._text("sparkline_text", "Descent rate / Alt", WHITE, (x, y + plot_height + 2)),
+        ]
+
+    def draw_prediction(self, screen, height, prediction, camera=None):
+        """Draw a TrajectoryPredictor result: the path to the ground and the contact point, green
+        if the touchdown would be inside the landing envelope and red if not. Returns the rects
+        drawn.
+        """
+        if prediction is None:
+            return []
+        offset = camera.offset if camera is not None else 0
+        color = GREEN if prediction["safe"] else RED
+        rects = []
+
+        xs, ys = prediction["path"]
+        if len(xs) >= 2:
+            # Every few steps is plenty for a smooth line, always ending at the last one
+            xs = np.append(xs[::4], xs[-1])
+            ys = np.append(ys[::4], ys[-1])
+            points = np.stack((xs - offset, height - ys), axis=1)
+            rects.append(pygame.draw.lines(screen, (90, 90, 90), False, points.tolist()))
+
+        x = int(prediction["x"] - offset)
+        y = int(height - prediction["y"])
+        rects.append(pygame.draw.line(screen, color, (x - 6, y - 6), (x + 6, y + 6), 2))
+        rects.append(pygame.draw.line(screen, color, (x - 6, y + 6), (x + 6, y - 6), 2))
+        label = (
+            f"vv {prediction['vv']:.1f} vh {prediction['vh']:.1f} "
+            f"tilt {prediction['tilt']:.0f}° in {prediction['t']:.0f}s"
+        )
+        if prediction["safe"] and not prediction["on_pad"]:
+            label += " off pad"
+        _, surface, pos = self._text("prediction", label, color, (x + 10, y - 30))
+        rects.append(screen.blit(surface, pos))
+        return rects
 
     def format_met(self, seconds):
         hours = int(seconds // 3600)
@@ -99,7 +211,23 @@ class HUD:
         hundredths = int((seconds * 100) % 100)
         return f"{hours:03d}:{minutes:02d}:{secs:02d}.{hundredths:02d}"
 
-    def draw(self, screen, velocity, fuel, max_fuel, altitude, throttle_pct, total_time):
+    def draw(
+        self,
+        screen,
+        velocity,
+        fuel,
+        max_fuel,
+        altitude,
+        throttle_pct,
+        total_time,
+        pad=None,
+        telemetry=None,
+    ):
+        """Blit every HUD widget and return the screen rects that were drawn.
+
+        pad is the TerrainIndex.nearest_pad result for the lander, if there is one, and telemetry
+        the flight's Telemetry for the descent rate plot.
+        """
         vx = velocity.x
         vy = velocity.y
 
@@ -108,45 +236,49 @@ class HUD:
         vx_color = RED if abs(vx) > 3.0 else YELLOW if abs(vx) > 2.0 else WHITE
         vy_color = RED if vy < -5.0 else YELLOW if vy < -3.0 else WHITE
 
-        vx_text = self.font.render(f"{h_dir:<2} {abs(vx):.1f} m/s ", True, vx_color)
-        screen.blit(vx_text, (10, 10))
-
-        vy_text = self.font.render(f"{v_dir:<2} {abs(vy):.1f} m/s ", True, vy_color)
-        screen.blit(vy_text, (10, 30))
-
-        alt_text = self.font.render(f"Alt: {int(altitude)}", True, WHITE)
-        screen.blit(alt_text, (10, 50))
-
-        met = self.font.render(f"Time: {self.format_met(total_time)}", True, WHITE)
-        screen.blit(met, (10, 70))
+        widgets = [
+            self._text("vx", f"{h_dir:<2} {abs(vx):.1f} m/s ", vx_color, (10, 10)),
+            self._text("vy", f"{v_dir:<2} {abs(vy):.1f} m/s ", vy_color, (10, 30)),
+            self._text("alt", f"Alt: {int(altitude)}", WHITE, (10, 50)),
+            self._text("met", f"Time: {self.format_met(total_time)}", WHITE, (10, 70)),
+        ]
+        if pad is not None:
+            pad_dir = "↓" if pad["dx"] == 0 else "→" if pad["dx"] > 0 else "←"
+            pad_pos = (screen.get_width() - 190, 35)
+            widgets.append(
+                self._text("pad", f"Pad: {pad_dir} {int(pad['distance'])}", WHITE, pad_pos)
+            )
+        if telemetry is not None:
+            widgets += self._sparkline(screen, telemetry)
+        widgets += self._fuel_gauge(screen, fuel, max_fuel)
+        widgets += self._throttle_gauge(throttle_pct)
 
-        self._draw_fuel_gauge(screen, fuel, max_fuel)
-        self._draw_throttle_gauge(screen, throttle_pct)
+        return [screen.blit(surface, pos) for _, surface, pos in widgets]
 
 
 class Menu:
     def __init__(self):
-        self.font_title = pygame.font.SysFont("Arial", 50)
-        self.font_option = pygame.font.SysFont("Arial", 25)
-        self.gravity = app_config.gravity if app_config.gravity else GRAVITY_MOON
-        self.difficulty = app_config.difficulty if app_config.difficulty else 1
+        self.font_title = assets.font("menu_title")
+        self.font_option = assets.font("menu_option")
+        self.gravity = app_config.gravity
+        self.difficulty = app_config.difficulty
 
     def draw(self, screen):
         screen.fill((0, 0, 0))
 
-        title = self.font_title.render("L U N A R  L A N D E R", True, WHITE)
+        title = text_cache.render(self.font_title, "L U N A R  L A N D E R", WHITE)
         screen.blit(title, (screen.get_width() // 2 - title.get_width() // 2, 200))
 
-        start_text = self.font_option.render("Press SPACE to Start", True, GREEN)
+        start_text = text_cache.render(self.font_option, "Press SPACE to Start", GREEN)
         screen.blit(start_text, (screen.get_width() // 2 - start_text.get_width() // 2, 400))
 
-        grav_text = self.font_option.render(f"< Gravity: {self.gravity:.3f} >", True, WHITE)
+        grav_text = text_cache.render(self.font_option, f"< Gravity: {self.gravity:.3f} >", WHITE)
         screen.blit(grav_text, (screen.get_width() // 2 - grav_text.get_width() // 2, 500))
 
-        diff_text = self.font_option.render(f"^ Difficulty: {self.difficulty} v", True, WHITE)
+        diff_text = text_cache.render(self.font_option, f"^ Difficulty: {self.difficulty} v", WHITE)
         screen.blit(diff_text, (screen.get_width() // 2 - diff_text.get_width() // 2, 550))
 
-        editor_text = self.font_option.render("Press E for Terrain Editor", True, YELLOW)
+        editor_text = text_cache.render(self.font_option, "Press E for Terrain Editor", YELLOW)
         screen.blit(editor_text, (screen.get_width() // 2 - editor_text.get_width() // 2, 650))
 
     def handle_input(self, events):
@@ -180,7 +312,7 @@ class InputBox:
         self.color_active = pygame.Color("dodgerblue2")
         self.color = self.color_inactive
         self.text = text
-        self.font = pygame.font.Font(None, 32)
+        self.font = assets.font("input")
         self.txt_surface = self.font.render(text, True, self.color)
         self.active = False
         self.done = False
@@ -222,25 +354,29 @@ class InputBox:
 
 class GameOverMenu:
     def __init__(self):
-        self.font = pygame.font.SysFont("Arial", 36)
-        self.small_font = pygame.font.SysFont("Arial", 24)
+        self.font = assets.font("game_over")
+        self.small_font = assets.font("game_over_small")
 
     def draw(self, screen, result_text, stats=None):
         # Draw semi-transparent background?
         # Just draw text over game
 
-        text = self.font.render(result_text, True, WHITE)
+        text = text_cache.render(self.font, result_text, WHITE)
         screen.blit(
             text, (screen.get_width() // 2 - text.get_width() // 2, screen.get_height() // 2 - 100)
         )
 
         if stats:
             # stats = {'fuel': float, 'vx': float, 'vy': float, 'angle': float}
-            stats_text1 = self.small_font.render(f"Fuel: {int(stats['fuel'])}", True, WHITE)
-            stats_text2 = self.small_font.render(
-                f"Impact Vel: H {stats['vx']:.1f} m/s, V {stats['vy']:.1f} m/s", True, WHITE
+            stats_text1 = text_cache.render(self.small_font, f"Fuel: {int(stats['fuel'])}", WHITE)
+            stats_text2 = text_cache.render(
+                self.small_font,
+                f"Impact Vel: H {stats['vx']:.1f} m/s, V {stats['vy']:.1f} m/s",
+                WHITE,
+            )
+            stats_text3 = text_cache.render(
+                self.small_font, f"Angle: {stats['angle']:.1f} deg", WHITE
             )
-            stats_text3 = self.small_font.render(f"Angle: {stats['angle']:.1f} deg", True, WHITE)
 
             screen.blit(
                 stats_text1,
@@ -264,7 +400,7 @@ class GameOverMenu:
                 ),
             )
 
-        restart_text = self.small_font.render("Press SPACE to Play Again", True, WHITE)
+        restart_text = text_cache.render(self.small_font, "Press SPACE to Play Again", WHITE)
         screen.blit(
             restart_text,
             (
@@ -273,7 +409,7 @@ class GameOverMenu:
             ),
         )
 
-        menu_text = self.small_font.render("Press ESC for Menu", True, WHITE)
+        menu_text = text_cache.render(self.small_font, "Press ESC for Menu", WHITE)
         screen.blit(
             menu_text,
             (screen.get_width() // 2 - menu_text.get_width() // 2, screen.get_height() // 2 + 90),
@@ -11,6 +11,7 @@ ORANGE = (255, 165, 0)
 GRAY = (100, 100, 100)
 GRAVITY_MOON = 1.62
 GRAVITY_EARTH = 9.81
+SCREEN_WIDTH, SCREEN_HEIGHT = 1800, 900
 
 
 def to_pygame(p, height):
@@ -23,28 +24,136 @@ def from_pygame(p, height):
     return to_pygame(p, height)
 
 
+def cache_dir():
+    """Per-user directory for files the game can rebuild, like $XDG_CACHE_HOME/lunar-lander."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "lunar-lander")
+
+
+def data_dir():
+    """Per-user directory for files the game keeps, like $XDG_DATA_HOME/lunar-lander."""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "share"
+    )
+    return os.path.join(base, "lunar-lander")
+
+
+def parse_bool(text):
+    value = str(text).strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off", ""):
+        return False
+    raise ValueError(f"not a boolean: {text!r}")
+
+
+# Every setting as name: (type, default, help). Each can be set in .env as NAME=value, in the
+# environment as LANDER_NAME=value or on the command line as --name value, in rising precedence.
+SETTINGS = {
+    "terrain_file": (str, None, "Level file to play instead of the bundled levels"),
+    "difficulty": (int, 1, "Starting difficulty, 1-5"),
+    "gravity": (float, GRAVITY_MOON, "Starting gravity in m/s^2"),
+    "debug": (bool, False, "Draw debug shapes and print asset and cache statistics"),
+    "fps": (int, 30, "Render frame cap, 0 for uncapped. Physics always runs at 30 Hz."),
+    "physics_substeps": (int, 1, "pymunk steps per physics step"),
+    "render_scale": (float, 1.0, "Window size as a multiple of the game's resolution"),
+    "vsync": (bool, False, "Sync display updates to the monitor"),
+    "headless": (bool, False, "Render offscreen without opening a window"),
+    "profiler": (bool, False, "Phase timing overlay, and a Chrome trace written on exit"),
+    "prediction": (bool, True, "Show where and how fast the lander will touch down"),
+    "trace_file": (str, "lander_trace.json", "Where the profiler writes its Chrome trace"),
+    "dirty_rects": (bool, False, "Only update the changed parts of the display"),
+    "sprite_cache": (str, "lazy", "Build the rotated lander sprites 'lazy' or 'eager'"),
+    "world_width": (int, None, "Play a generated world this wide instead of a level, 0 endless"),
+    "terrain_seed": (int, None, "Seed for generated terrain, random if unset"),
+    "recordings_dir": (str, None, "Where flight recordings are saved (default: user data dir)"),
+    "telemetry_format": (str, "npz", "Telemetry export format, npz or csv"),
+}
+ENV_PREFIX = "LANDER_"
+
+
 class Config:
-    def __init__(self):
-        self.env_path = os.path.join(os.path.dirname(__file__), ".env")
-        if os.path.exists(self.env_path):
-            with open(self.env_path, "r") as f:
-                for line in f:
-                    key, value = line.strip().split("=")
-                    for t in (int, float, bool, str):
-                        if t is bool:
-                            if value.strip().lower() in ("true", "false", "1", "0"):
-                                self.__setattr__(key.strip().lower(), t(value.strip()))
-                                break
-                            continue
-                        else:
-                            try:
-                                self.__setattr__(key.strip().lower(), t(value.strip()))
-                                break
-                            except ValueError:
-                                pass
+    """Settings resolved once into plain, typed attributes.
+
+    Defaults come from SETTINGS, then .env next to this file, then LANDER_* environment
+    variables. The lander command line is applied on top with apply_args(). Nothing is read
+    until a setting is first used or set, so importing the package has no side effects.
+    """
+
+    def __init__(self, env_path=None, environ=None):
+        self.env_path = env_path or os.path.join(os.path.dirname(__file__), ".env")
+        self.environ = environ
+        self.loaded = False
 
     def __getattr__(self, name):
-        return self.__dict__.get(name.strip().lower(), None)
+        # Only reached while the settings aren't attributes yet
+        if name in SETTINGS and not self.loaded:
+            self.load()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name in SETTINGS and not self.loaded:
+            self.load()
+        super().__setattr__(name, value)
+
+    def load(self):
+        """Read the defaults, .env and the environment. Runs once, on first use."""
+        if self.loaded:
+            return
+        self.loaded = True
+        for name, (_, default, _) in SETTINGS.items():
+            setattr(self, name, default)
+        if os.path.exists(self.env_path):
+            self.load_env_file(self.env_path)
+        self.load_environ(os.environ if self.environ is None else self.environ)
+
+    def set(self, name, text, source):
+        """Parse text as setting name's type. A bad value is reported and the old one kept."""
+        kind = SETTINGS[name][0]
+        try:
+            setattr(self, name, parse_bool(text) if kind is bool else kind(text))
+        except ValueError as e:
+            print(f"Ignoring {source} setting {name}={text!r}: {e}")
+
+    def load_env_file(self, path):
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                # Trailing comments need a space before the #, so values can still contain one
+                value = value.split(" #", 1)[0].strip().strip("\"'")
+                name = key.strip().lower()
+                # Unknown keys are ignored, which is how lines are switched off (xGRAVITY=...)
+                if name in SETTINGS:
+                    self.set(name, value, path)
+
+    def load_environ(self, environ):
+        for name in SETTINGS:
+            value = environ.get(ENV_PREFIX + name.upper())
+            if value is not None:
+                self.set(name, value, "environment")
+
+    def add_arguments(self, parser):
+        """Add a --name option to an argparse parser for every setting."""
+        group = parser.add_argument_group("settings (also LANDER_<NAME> or NAME= in .env)")
+        for name, (kind, default, help) in SETTINGS.items():
+            option = "--" + name.replace("_", "-")
+            if kind is bool:
+                # --vsync on its own, or --vsync false to override .env
+                group.add_argument(option, type=parse_bool, nargs="?", const=True, help=help)
+            else:
+                group.add_argument(option, type=kind, metavar=name.upper(), help=help)
+
+    def apply_args(self, args):
+        """Override settings with the options given on the command line."""
+        self.load()
+        for name in SETTINGS:
+            value = getattr(args, name, None)
+            if value is not None:
+                setattr(self, name, value)
 
 
 app_config = Config()
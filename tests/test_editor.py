@@ -0,0 +1,83 @@
+import pytest
+
+from lunar_lander.editor import TerrainPoints
+
+
+def state(points):
+    return list(points.xs), list(points.ys), list(points.pads)
+
+
+def test_undo_redo_round_trip():
+    points = TerrainPoints([0], [450], [False])
+    history = [state(points)]
+
+    points.insert(400, 500)
+    history.append(state(points))
+    points.insert(200, 300)
+    history.append(state(points))
+    points.insert(800, 600)
+    history.append(state(points))
+
+    # A drag past other points is one undo step holding a single move
+    points.begin_edit()
+    i = points.xs.index(200)
+    for x in range(250, 651, 50):
+        i = points.move(i, x, 250)
+    points.end_edit()
+    assert points.xs == [0, 400, 650, 800]
+    assert len(points.undo_stack[-1]) == 1
+    history.append(state(points))
+
+    # Toggling a pad flattens its segment in the same step
+    points.begin_edit()
+    points.set_pad(1, True)
+    points.move(2, points.xs[2], points.ys[1])
+    points.end_edit()
+    assert points.pads == [False, True, False, False]
+    assert points.ys[2] == points.ys[1]
+    history.append(state(points))
+
+    for expected in reversed(history[:-1]):
+        assert points.undo()
+        assert state(points) == expected
+    assert not points.undo()
+
+    for expected in history[1:]:
+        assert points.redo()
+        assert state(points) == expected
+    assert not points.redo()
+
+
+def test_nested_edit_joins_the_drag():
+    points = TerrainPoints([0, 100, 300], [400, 300, 350], [False, False, False])
+    before = state(points)
+
+    points.begin_edit()
+    i = points.move(1, 150, 250)
+    # A pad toggle while the drag is still going
+    points.begin_edit()
+    points.set_pad(0, True)
+    points.end_edit()
+    # Undo is refused until the outer edit ends
+    assert not points.undo()
+    points.move(i, 200, 260)
+    points.end_edit()
+
+    assert points.undo()
+    assert state(points) == before
+    assert not points.undo()
+
+
+def test_point_and_segment_lookup():
+    points = TerrainPoints([0, 100, 100, 200], [400, 400, 300, 300], [False] * 4)
+    assert points.point_at(103, 304) == 2
+    assert points.point_at(150, 350) == -1
+    # The vertical segment from (100, 400) to (100, 300) is never picked, or divided by
+    assert points.segment_at(100, 300) == 2
+    assert points.segment_at(50, 405) == 0
+    assert points.segment_at(50, 350) == -1
+
+
+def test_unsorted_points_are_rejected():
+    with pytest.raises(ValueError):
+        TerrainPoints([0, 200, 100], [400, 400, 400], [False, True, False])
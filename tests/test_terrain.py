@@ -0,0 +1,20 @@
+import pytest
+
+from lunar_lander.simulation import Simulation
+
+
+@pytest.mark.parametrize("direction", [-1, 1])
+def test_flying_off_the_world_keeps_terrain(direction):
+    sim = Simulation(difficulty=1, spawn=(300, 850))
+    if direction > 0:
+        sim.reset(spawn=(sim.terrain.extent - 300, 850))
+    sim.lander.body.velocity = (300 * direction, 0)
+
+    for _ in range(900):
+        if sim.step(0.5):
+            break
+        assert sim.terrain.chunks
+
+    x = sim.lander.body.position.x
+    assert x < -3 * sim.width if direction < 0 else x > sim.terrain.extent + 3 * sim.width
+    assert len(sim.terrain.xs) > 0